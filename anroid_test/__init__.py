@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Android test automation with Appium.
+The action functions and the modules are loaded on the first attribute access, so the scripts which need
+only some of them (e.g. keycodes) do not pay the import time of the others.
+
+    import anroid_test
+
+    anroid_test.press_keycodes(_driver, [3, 187])
+    anroid_test.touch(_driver, '//*[@text="Battery"]')
+"""
+import importlib
+
+# Module names in anroid_test.module which can be accessed as the attributes. (e.g. anroid_test.instrumentation)
+_SUBMODULES = (
+    "action_additional", "action_keycode", "action_touch", "artifact_store", "async_actions", "async_logging",
+    "geometry", "gesture", "gesture_path", "instrumentation", "locator", "network", "page_snapshot", "recorder",
+    "runner", "scenario", "scheduler", "screencapture", "service_manager", "session_health", "session_pool",
+    "session_state", "shell", "visual_locator", "wait",
+)
+
+# Exported names by module name in anroid_test.module.
+_EXPORTS = {
+    "action_touch": ("double_touch", "long_press", "pinch_in", "pinch_out", "rotate", "scroll", "swipe", "touch"),
+    "action_keycode": ("control_powerkey", "end_call", "go_to_app_history", "go_to_back", "go_to_call",
+                       "go_to_camera", "go_to_contacts", "go_to_home", "go_to_music", "go_to_settings",
+                       "open_notification", "open_voice_assist", "press_keycodes", "volume_down", "volume_mute",
+                       "volume_up"),
+    "action_additional": ("authenticate_fingerprint", "back", "enter_text", "fill_form", "lock_screen",
+                          "rotate_screen", "shake", "unlock_screen"),
+    "network": ("get_network_type", "gsm_call", "gsm_set_siginal", "gsm_set_voice", "send_sms",
+                "set_network_connection", "set_network_speed"),
+    "screencapture": ("save_ui_dump", "start_recording", "stop_recording"),
+    "wait": ("settle_ui", "wait_for_idle"),
+    "locator": ("optimize_locator",),
+    "visual_locator": ("locate_image",),
+    "recorder": ("Recorder", "load_recording", "replay"),
+    "runner": ("allocate_ports", "run_on_devices"),
+    "scenario": ("compile_scenario", "execute_plan", "load_scenario", "run_scenario"),
+    "scheduler": ("DurationHistory", "plan_assignments", "run_scheduled"),
+    "service_manager": ("AppiumServiceManager", "probe_status", "wait_until_ready"),
+    "session_pool": ("SessionPool", "get_connection"),
+    "session_state": ("SessionStateCache",),
+    "session_health": ("HealthMonitor", "SessionUnhealthyError", "probe_device", "probe_server"),
+    "async_logging": ("disable_async_logging", "enable_async_logging", "flush_ring", "get_logger"),
+}
+
+_MODULE_OF_NAME = {_name: _module_name for _module_name, _names in _EXPORTS.items() for _name in _names}
+
+__all__ = sorted(_MODULE_OF_NAME)
+
+
+def __getattr__(name):
+    """Import the module of the name on the first access and cache the attribute in the package.
+
+    :param str name: Exported name or module name.
+    :return: Function, class or module.
+    """
+    if name in _MODULE_OF_NAME:
+        _value = getattr(importlib.import_module(f"anroid_test.module.{_MODULE_OF_NAME[name]}"), name)
+    elif name in _SUBMODULES:
+        _value = importlib.import_module(f"anroid_test.module.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = _value
+    return _value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULES))
@@ -2,7 +2,6 @@
 
 import logging
 
-import appium.webdriver.appium_service
 from miraelogger import Logger
 from appium import webdriver
 from appium.webdriver.common.appiumby import AppiumBy
@@ -10,6 +9,8 @@ from appium.webdriver.common.appiumby import AppiumBy
 import urllib3.exceptions
 import selenium.common.exceptions
 
+from anroid_test.module.service_manager import AppiumServiceManager
+
 LOGGER = Logger(log_name=__name__, stream_log_level=logging.DEBUG)
 
 # Please input the device name of your android phone.
@@ -24,14 +25,12 @@ capabilities = dict(
 
 if __name__ == "__main__":
     """Run basic test."""
-    _appium_service = appium.webdriver.appium_service.AppiumService()
-    _appium_service.start()
-    LOGGER.info(f"Appium service start")
-
-    LOGGER.info(selenium.webdriver.common.utils.is_url_connectable(4723))
+    # Reuse the Appium server of the previous script, or start it and wait until '/status' is ready.
+    _service_manager = AppiumServiceManager(4723).start()
+    LOGGER.info(_service_manager.is_ready())
 
     try:
-        _driver = webdriver.Remote(r"http://localhost:4723", capabilities)
+        _driver = webdriver.Remote(_service_manager.url, capabilities)
     except urllib3.exceptions.MaxRetryError:
         LOGGER.warn(f"could not connect {capabilities['deviceName']}. Maybe, Appium service does not start normally.")
         exit()
@@ -55,6 +54,5 @@ if __name__ == "__main__":
     _driver.quit()
     LOGGER.info(f"{capabilities['deviceName']} is disconnected.")
 
-    _appium_service.stop()
-    LOGGER.info(f"Appium service stop")
+    _service_manager.stop()
 
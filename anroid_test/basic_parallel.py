@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from miraelogger import Logger
+
+from anroid_test.basic_touch import run_basic_touch, galaxy_s20_capabilites, galaxy_tap_s6_lite_capabilities
+from anroid_test.module.async_logging import enable_async_logging, disable_async_logging
+from anroid_test.module.runner import run_on_devices
+
+LOGGER = Logger(log_name=__name__, stream_log_level=logging.DEBUG)
+
+
+if __name__ == "__main__":
+    """Run basic touch test on all devices at the same time."""
+    # The action logs of the devices are written by one background thread. DEBUG logs are written only on failure.
+    enable_async_logging()
+    try:
+        _results = run_on_devices(run_basic_touch, [galaxy_s20_capabilites, galaxy_tap_s6_lite_capabilities],
+                                  args=["--relaxed-security", "--log-timestamp"])
+    finally:
+        disable_async_logging()
+
+    for _device_name, _result in _results.items():
+        if _result['error'] is None:
+            LOGGER.info(f"{_device_name} is passed. ({_result['elapsed']:.1f} sec)")
+        else:
+            LOGGER.warn(f"{_device_name} is failed. ({_result['error']})")
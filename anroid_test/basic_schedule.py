@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+
+from miraelogger import Logger
+
+from anroid_test.basic_touch import run_basic_touch, galaxy_s20_capabilites, galaxy_tap_s6_lite_capabilities
+from anroid_test.module.async_logging import enable_async_logging, disable_async_logging
+from anroid_test.module.scenario import run_scenario
+from anroid_test.module.scheduler import run_scheduled
+
+LOGGER = Logger(log_name=__name__, stream_log_level=logging.DEBUG)
+
+# Traits of the devices which are not the capabilities.
+DEVICE_TRAITS = {
+    galaxy_s20_capabilites['deviceName']: {"formFactor": "phone"},
+    galaxy_tap_s6_lite_capabilities['deviceName']: {"formFactor": "tablet"},
+}
+
+SCENARIO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "basic_touch.yaml")
+
+
+if __name__ == "__main__":
+    """Run the scenarios on the devices from the longest scenario."""
+    _jobs = [
+        {"name": "basic_touch", "scenario": run_basic_touch},
+        {"name": "basic_touch_yaml", "scenario": lambda _driver: run_scenario(_driver, SCENARIO_PATH),
+         "requires": {"platformVersion": ">=12"}},
+        {"name": "basic_touch_tablet", "scenario": run_basic_touch, "requires": {"formFactor": "tablet"}},
+    ]
+
+    enable_async_logging()
+    try:
+        _results = run_scheduled(_jobs, [galaxy_s20_capabilites, galaxy_tap_s6_lite_capabilities],
+                                 traits=DEVICE_TRAITS, args=["--relaxed-security", "--log-timestamp"])
+    finally:
+        disable_async_logging()
+
+    for _job_name, _result in _results.items():
+        if _result['error'] is None:
+            LOGGER.info(f"{_job_name} is passed on {_result['device']}. ({_result['elapsed']:.1f} sec)")
+        else:
+            LOGGER.warn(f"{_job_name} is failed. ({_result['error']})")
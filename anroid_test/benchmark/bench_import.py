@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the import time.
+Run each import statement in the new interpreter, like the short-lived worker process, and report the wall time.
+
+    python -m anroid_test.benchmark.bench_import --repeat 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Import statements to measure by case name.
+CASES = {
+    "python": "pass",
+    "star import (basic_touch.py)": "from anroid_test.module.action_touch import *; "
+                                    "from anroid_test.module.action_keycode import *; "
+                                    "from anroid_test.module.action_additional import *",
+    "facade": "import anroid_test",
+    "facade + press_keycodes": "import anroid_test; anroid_test.press_keycodes",
+    "facade + touch": "import anroid_test; anroid_test.touch",
+    "facade + pinch_in": "import anroid_test; anroid_test.pinch_in; import anroid_test.module.gesture_path",
+    "appium.webdriver": "import appium.webdriver",
+}
+
+_TIMER = "import time; _start_time = time.perf_counter(); {statement}; print(time.perf_counter() - _start_time)"
+
+
+def measure(statement, repeat=5) -> list:
+    """Measure the wall time of the statement in the new interpreters.
+
+    :param str statement: Python statement.
+    :param int repeat: The number of the interpreters. (default=5)
+    :return: Wall time list, in seconds.
+    :rtype: list.
+    """
+    _root_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    _durations = []
+    for _ in range(repeat):
+        _output = subprocess.run([sys.executable, "-c", _TIMER.format(statement=statement)], cwd=_root_path,
+                                 capture_output=True, text=True, check=True).stdout
+        _durations.append(float(_output.strip().splitlines()[-1]))
+    return _durations
+
+
+def run_benchmark(repeat=5) -> list:
+    """Measure every case.
+
+    :param int repeat: The number of the interpreters of each case. (default=5)
+    :return: Result list [{"case", "median_ms", "min_ms"}].
+    :rtype: list.
+    """
+    _results = []
+    for _case, _statement in CASES.items():
+        _durations = measure(_statement, repeat)
+        _results.append({"case": _case, "median_ms": statistics.median(_durations) * 1000,
+                         "min_ms": min(_durations) * 1000})
+    return _results
+
+
+if __name__ == "__main__":
+    """Run the benchmark."""
+    _parser = argparse.ArgumentParser(description="Benchmark of the import time")
+    _parser.add_argument("--repeat", type=int, default=5, help="The number of the interpreters of each case.")
+    _arguments = _parser.parse_args()
+
+    print(f"{'case':<32} {'median ms':>9} {'min ms':>9}")
+    for _result in run_benchmark(_arguments.repeat):
+        print(f"{_result['case']:<32} {_result['median_ms']:>9.1f} {_result['min_ms']:>9.1f}")
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of anroid_test.module against the fake Appium server.
+Report the HTTP round trips, wall time and peak memory of each public function. (No device is needed)
+
+    python -m anroid_test.benchmark.bench_modules --latency 0.02 --repeat 5 --json bench.json
+"""
+import argparse
+import importlib
+import inspect
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from appium import webdriver
+from miraelogger import Logger
+
+from anroid_test.benchmark.fake_appium_server import FakeAppiumServer
+from anroid_test.module import instrumentation
+
+LOGGER = Logger(log_name=__name__, stream_log_level=logging.INFO)
+
+MODULE_NAMES = ("action_touch", "action_keycode", "action_additional", "network", "screencapture")
+
+capabilities = {
+    "platformName": 'Android',
+    "automationName": 'uiautomator2',
+    "deviceName": 'fake-device',
+    "appPackage": 'com.android.settings',
+    "appActivity": '.Settings',
+}
+
+# Arguments after the driver by function name. "{tmp}" is replaced with the temporary directory.
+# The functions which take only the driver do not need the case.
+CASES = {
+    "touch": (['//*[@text="Battery"]'], {}),
+    "double_touch": ([{"x": 700, "y": 700}], {}),
+    "long_press": (['//*[@content-desc="지도"]'], {}),
+    "scroll": ([], {"times": 4}),
+    "swipe": (["left", 3], {}),
+    "pinch_in": ([2], {}),
+    "pinch_out": ([2], {}),
+    "rotate": ([80, "clockwise", 2], {}),
+    "enter_text": (['//*[@text="Battery"]', "hello"], {}),
+    "fill_form": ([{'//*[@text="Battery"]': "hello", '//*[@text="연결"]': "안녕"}], {}),
+    "back": ([], {}),
+    "shake": ([], {}),
+    "lock_screen": ([1], {}),
+    "unlock_screen": ([], {}),
+    "rotate_screen": (["PORTRAIT"], {}),
+    "authenticate_fingerprint": ([1], {}),
+    "control_powerkey": ([], {}),
+    "press_keycodes": ([[3, 187, 4]], {}),
+    "get_network_type": ([], {}),
+    "set_network_connection": ([], {}),
+    "set_network_speed": ([], {}),
+    "send_sms": (["01012345678", "hello"], {}),
+    "gsm_call": (["01012345678"], {}),
+    "gsm_set_siginal": ([], {}),
+    "gsm_set_voice": ([], {}),
+    "save_ui_dump": (["{tmp}"], {}),
+    "start_recording": ([], {}),
+    "stop_recording": (["{tmp}"], {}),
+}
+
+
+def _resolve_arguments(arguments, temp_path):
+    """Replace the "{tmp}" placeholder with the temporary directory.
+
+    :param list arguments: Case arguments.
+    :param str temp_path: Temporary directory path.
+    :return: Resolved arguments.
+    :rtype: list.
+    """
+    return [temp_path if _argument == "{tmp}" else _argument for _argument in arguments]
+
+
+def _wait_result(value):
+    """Wait the background work of the function. (e.g. Future of save_ui_dump)
+
+    :param value: Return value of the function.
+    """
+    if hasattr(value, "result") and callable(value.result):
+        value.result()
+
+
+def collect_functions(module_names=MODULE_NAMES) -> list:
+    """Collect the public functions of the modules.
+
+    :param tuple module_names: Module names in anroid_test.module.
+    :return: Function list [(module_name, function_name, function), ...].
+    :rtype: list.
+    """
+    _functions = []
+    for _module_name in module_names:
+        _module = importlib.import_module(f"anroid_test.module.{_module_name}")
+        for _name, _func in inspect.getmembers(_module, inspect.isfunction):
+            if _func.__module__ == _module.__name__ and not _name.startswith('_'):
+                _functions.append((_module_name, _name, _func))
+    return _functions
+
+
+def run_benchmark(latency=0.0, repeat=3, node_count=200) -> list:
+    """Run the benchmark of every public function.
+
+    :param float latency: Latency of every fake server request, in seconds. (default=0.0)
+    :param int repeat: Repeat times of each function. (default=3)
+    :param int node_count: The number of nodes in the fake page source. (default=200)
+    :return: Result list [{"function", "first_round_trips", "round_trips", "mean_ms", "median_ms", "peak_kib"}
+        or {"function", "skipped"}]. The round_trips is of the last repeat. (e.g. After the caches are warm)
+    :rtype: list.
+    """
+    instrumentation.enable(MODULE_NAMES)
+    _results = []
+    with FakeAppiumServer(latency=latency, node_count=node_count) as _server, \
+            tempfile.TemporaryDirectory() as _temp_path:
+        _driver = webdriver.Remote(_server.url, capabilities)
+        instrumentation.instrument_driver(_driver)
+        try:
+            for _module_name, _name, _func in collect_functions():
+                _full_name = f"{_module_name}.{_name}"
+                if _name in CASES:
+                    _arguments, _keyword_arguments = CASES[_name]
+                elif len(inspect.signature(_func).parameters) == 1:
+                    _arguments, _keyword_arguments = [], {}
+                else:
+                    _results.append({"function": _full_name, "skipped": "no benchmark case"})
+                    continue
+
+                _arguments = _resolve_arguments(_arguments, _temp_path)
+                _durations = []
+                _round_trips = []
+                _peak = 0
+                for _ in range(repeat):
+                    _request_count = _server.request_count
+                    tracemalloc.start()
+                    _start_time = time.perf_counter()
+                    try:
+                        _wait_result(_func(_driver, *_arguments, **_keyword_arguments))
+                    except Exception as e:
+                        tracemalloc.stop()
+                        _results.append({"function": _full_name, "skipped": f"failed ({type(e).__name__})"})
+                        break
+                    _durations.append(time.perf_counter() - _start_time)
+                    _peak = max(_peak, tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                    _round_trips.append(_server.request_count - _request_count)
+                else:
+                    _results.append({
+                        "function": _full_name,
+                        "first_round_trips": _round_trips[0],
+                        "round_trips": _round_trips[-1],
+                        "mean_ms": statistics.mean(_durations) * 1000,
+                        "median_ms": statistics.median(_durations) * 1000,
+                        "peak_kib": _peak / 1024,
+                    })
+        finally:
+            _driver.quit()
+    return _results
+
+
+def format_results(results) -> str:
+    """Format the results as the text table.
+
+    :param list results: Results from run_benchmark().
+    :return: Text table.
+    :rtype: str.
+    """
+    _lines = [f"{'function':<45} {'first trips':>11} {'round trips':>11} {'mean ms':>9} {'median ms':>9} "
+              f"{'peak KiB':>9}"]
+    for _result in results:
+        if "skipped" in _result:
+            _lines.append(f"{_result['function']:<45} skipped: {_result['skipped']}")
+        else:
+            _lines.append(f"{_result['function']:<45} {_result['first_round_trips']:>11} {_result['round_trips']:>11} "
+                          f"{_result['mean_ms']:>9.1f} "
+                          f"{_result['median_ms']:>9.1f} {_result['peak_kib']:>9.1f}")
+    return "\n".join(_lines)
+
+
+if __name__ == "__main__":
+    """Run the benchmark."""
+    _parser = argparse.ArgumentParser(description="Benchmark of anroid_test.module against the fake Appium server")
+    _parser.add_argument("--latency", type=float, default=0.0, help="Latency of every request, in seconds.")
+    _parser.add_argument("--repeat", type=int, default=3, help="Repeat times of each function.")
+    _parser.add_argument("--nodes", type=int, default=200, help="The number of nodes in the page source.")
+    _parser.add_argument("--json", default=None, help="JSON file path to save the results.")
+    _arguments = _parser.parse_args()
+
+    _results = run_benchmark(_arguments.latency, _arguments.repeat, _arguments.nodes)
+    print(format_results(_results))
+
+    if _arguments.json is not None:
+        with open(_arguments.json, 'w', encoding='utf-8') as f:
+            json.dump({"results": _results, "functions": instrumentation.export_json()['function']}, f,
+                      ensure_ascii=False, indent=2)
+        LOGGER.info(f"Save the results into {os.path.abspath(_arguments.json)}")
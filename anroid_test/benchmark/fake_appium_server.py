@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""Fake Appium server.
+Local stand-in HTTP server which speaks the subset of the WebDriver/Appium protocol used by anroid_test.module,
+with the configurable latency and payload sizes. (No device is needed)
+"""
+import argparse
+import base64
+import http.server
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+import urllib.request
+import uuid
+
+from miraelogger import Logger
+
+LOGGER = Logger(log_name=__name__, stream_log_level=logging.DEBUG)
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+# Texts which the fake page source has. (The xpath expressions in the scripts can be found)
+PAGE_TEXTS = ("Battery", "연결", "지도", "찾기")
+
+
+def make_page_source(node_count) -> str:
+    """Make the UiAutomator2 like page source.
+
+    :param int node_count: The number of nodes.
+    :return: Page source XML.
+    :rtype: str.
+    """
+    _nodes = []
+    for _index in range(node_count):
+        _text = PAGE_TEXTS[_index] if _index < len(PAGE_TEXTS) else f"item {_index}"
+        _top = (_index * 40) % 2400
+        _nodes.append(f'    <android.widget.TextView index="{_index}" package="com.android.settings" '
+                      f'class="android.widget.TextView" text="{_text}" content-desc="{_text}" '
+                      f'resource-id="android:id/title" clickable="true" bounds="[0,{_top}][1080,{_top + 40}]" />')
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<hierarchy index="0" class="hierarchy" rotation="0" '
+            'width="1080" height="2400">\n' + "\n".join(_nodes) + "\n</hierarchy>")
+
+
+class _FakeAppiumHandler(http.server.BaseHTTPRequestHandler):
+    """WebDriver request handler of the fake server."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _send_value(self, value, status=200):
+        """Send the WebDriver response.
+
+        :param value: Response value.
+        :param int status: HTTP status code.
+        """
+        _body = json.dumps({"value": value}).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(_body)))
+        self.end_headers()
+        self.wfile.write(_body)
+
+    def _read_body(self) -> dict:
+        """Read the JSON request body.
+
+        :return: Request body.
+        :rtype: dict.
+        """
+        _length = int(self.headers.get('Content-Length', 0))
+        if _length == 0:
+            return {}
+        return json.loads(self.rfile.read(_length) or b"{}")
+
+    def _handle(self):
+        """Handle the request."""
+        _body = self._read_body()
+        self.server.request_count += 1
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+
+        _path = self.path.split("?", 1)[0].rstrip("/")
+        if self.command == "GET" and _path == "/status":
+            return self._send_value({"ready": True, "message": "The fake server is ready"})
+
+        if self.command == "POST" and _path == "/session":
+            _capabilities = _body.get("capabilities", {}).get("alwaysMatch", {})
+            return self._send_value({"sessionId": f"fake-{next(self.server.session_ids)}",
+                                     "capabilities": _capabilities})
+
+        _match = re.fullmatch(r"/session/[^/]+(?P<command>/.*)?", _path)
+        if _match is None:
+            return self._send_value({"error": "unknown command", "message": _path}, 404)
+
+        _command = _match.group("command") or ""
+        if _command == "":
+            return self._send_value(None)
+        return self._send_value(self._command_value(_command, _body))
+
+    def _command_value(self, command, body):
+        """Return the response value of the session command.
+
+        :param str command: Command path after /session/:id.
+        :param dict body: Request body.
+        :return: Response value.
+        """
+        if command in ["/element", "/element/active"]:
+            return {ELEMENT_KEY: "fake-element"}
+        if command == "/elements":
+            return [{ELEMENT_KEY: "fake-element"}]
+        if command in ["/window/rect", "/window/current/size"]:
+            return {"x": 0, "y": 0, "width": 1080, "height": 2400}
+        if command == "/source":
+            return self.server.page_source
+        if command == "/screenshot":
+            return self.server.screenshot
+        if command == "/network_connection":
+            return 6
+        if command == "/orientation":
+            return "PORTRAIT"
+        if command.endswith("/is_keyboard_shown") or command.endswith("/is_locked"):
+            return False
+        if command.endswith("/current_activity"):
+            return ".Settings"
+        if command.endswith("/current_package"):
+            return "com.android.settings"
+        if command == "/execute/sync":
+            return self._script_value(body.get("script"))
+        if command.endswith("/stop_recording_screen"):
+            return self._stop_recording(body.get("options", {}))
+        return None
+
+    @staticmethod
+    def _script_value(script):
+        """Return the response value of the extension script.
+
+        :param str script: Script name. (e.g. mobile: getConnectivity)
+        :return: Response value.
+        """
+        if script == "mobile: getConnectivity":
+            return {"wifi": True, "data": True, "airplaneMode": False}
+        if script == "mobile: getCurrentActivity":
+            return ".Settings"
+        if script == "mobile: getCurrentPackage":
+            return "com.android.settings"
+        if script in ["mobile: isKeyboardShown", "mobile: isLocked"]:
+            return False
+        return None
+
+    def _stop_recording(self, options) -> str:
+        """Return the recording or upload it into remotePath as the multipart/form-data like Appium.
+
+        :param dict options: Stop recording options.
+        :return: Base64 video or empty string when it is uploaded.
+        :rtype: str.
+        """
+        if not options.get("remotePath"):
+            return self.server.recording
+
+        _boundary = uuid.uuid4().hex
+        _body = (f"--{_boundary}\r\nContent-Disposition: form-data; name=\"{options.get('fileFieldName', 'file')}\"; "
+                 f"filename=\"recording.mp4\"\r\nContent-Type: video/mp4\r\n\r\n").encode()
+        _body += base64.b64decode(self.server.recording) + f"\r\n--{_boundary}--\r\n".encode()
+        _request = urllib.request.Request(options["remotePath"], data=_body, method=options.get("method", "PUT"),
+                                          headers={"Content-Type": f"multipart/form-data; boundary={_boundary}"})
+        urllib.request.urlopen(_request).read()
+        return ""
+
+    do_GET = _handle
+    do_POST = _handle
+    do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        """Do not print the access log."""
+
+
+class FakeAppiumServer:
+    """Fake Appium server which runs on the background thread."""
+
+    def __init__(self, port=0, latency=0.0, node_count=200, screenshot_size=200 * 1024,
+                 recording_size=1024 * 1024):
+        """Initialize the FakeAppiumServer.
+
+        :param int port: Listening port. 0 means any free port. (default=0)
+        :param float latency: Latency of every request, in seconds. (default=0.0)
+        :param int node_count: The number of nodes in the page source. (default=200)
+        :param int screenshot_size: Screenshot PNG size, in bytes. (default=200 KiB)
+        :param int recording_size: Screen recording size, in bytes. (default=1 MiB)
+        """
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", port), _FakeAppiumHandler)
+        self._server.daemon_threads = True
+        self._server.latency = latency
+        self._server.request_count = 0
+        self._server.session_ids = itertools.count(1)
+        self._server.page_source = make_page_source(node_count)
+        self._server.screenshot = base64.b64encode(b"\x89PNG\r\n\x1a\n" + bytes(screenshot_size)).decode()
+        # Not zero bytes, so the corrupted upload is found.
+        _recording = (bytes(range(256)) * (recording_size // 256 + 1))[:recording_size]
+        self._server.recording = base64.b64encode(_recording).decode()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Server URL."""
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def recording(self) -> bytes:
+        """Screen recording which stop_recording_screen returns or uploads."""
+        return base64.b64decode(self._server.recording)
+
+    @property
+    def request_count(self) -> int:
+        """The number of the handled requests."""
+        return self._server.request_count
+
+    @property
+    def latency(self) -> float:
+        """Latency of every request, in seconds."""
+        return self._server.latency
+
+    @latency.setter
+    def latency(self, value):
+        self._server.latency = value
+
+    def start(self):
+        """Start the server on the background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake_appium_server", daemon=True)
+        self._thread.start()
+        LOGGER.info(f"Fake Appium server start on {self.url}")
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+        LOGGER.info(f"Fake Appium server stop")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+if __name__ == "__main__":
+    """Run the fake Appium server."""
+    _parser = argparse.ArgumentParser(description="Fake Appium server")
+    _parser.add_argument("--port", type=int, default=4723)
+    _parser.add_argument("--latency", type=float, default=0.0, help="Latency of every request, in seconds.")
+    _parser.add_argument("--nodes", type=int, default=200, help="The number of nodes in the page source.")
+    _arguments = _parser.parse_args()
+
+    _fake_server = FakeAppiumServer(_arguments.port, _arguments.latency, _arguments.nodes).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        _fake_server.stop()
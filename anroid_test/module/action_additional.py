@@ -3,12 +3,19 @@
 (https://milktea0614.tistory.com/76)
 """
 
-import logging
+import re
 
-from appium.webdriver.common.appiumby import AppiumBy
-from miraelogger import Logger
+from anroid_test.module.async_logging import get_logger
+from anroid_test.module.geometry import observe_orientation
+from anroid_test.module.locator import find_element
+from anroid_test.module.page_snapshot import get_center_position, get_text, take_snapshot
+from anroid_test.module.shell import execute_shell, is_shell_allowed
+from anroid_test.module.wait import settle_ui
 
-LOGGER = Logger(log_name=__name__, stream_log_level=logging.DEBUG)
+LOGGER = get_logger(__name__)
+
+# Printable ASCII which 'input text' can type, except '%' which is the escape character of 'input text'.
+_SHELL_TEXT_PATTERN = re.compile(r"[ -$&-~]+")
 
 
 # Keyboard
@@ -21,7 +28,7 @@ def enter_text(driver, xpath, text, clear=True, hide=True):
     :param bool clear: Clear option before input the text.
     :param bool hide: Hide keyboard option after input the text.
     """
-    _target = driver.find_element(by=AppiumBy.XPATH, value=xpath)
+    _target = find_element(driver, xpath)
     if clear:
         _target.clear()
 
@@ -31,13 +38,79 @@ def enter_text(driver, xpath, text, clear=True, hide=True):
         driver.hide_keyboard()
 
 
+def _quote_shell_text(text) -> str:
+    """Quote the text for 'input text' command in the device shell.
+
+    :param str text: Target text.
+    :return: Quoted text.
+    :rtype: str.
+    """
+    return "'" + text.replace(" ", "%s").replace("'", "'\\''") + "'"
+
+
+def fill_form(driver, fields, clear=True, hide=True, use_shell=False, snapshot=None):
+    """Enter the texts into several fields at once. The keyboard is hidden once at the end.
+    With use_shell, the ASCII texts are entered through one 'mobile: shell' call (tap the field center and
+    'input text') at the positions of one page source, and the other texts are entered by send_keys.
+    The positions are taken before the keyboard opens, so use it only on the form which the keyboard does not move.
+
+    :param WebDriver driver: WebDriver obj.
+    :param dict fields: Target text by element's xpath expression {xpath: text}.
+    :param bool clear: Clear option before input the text.
+    :param bool hide: Hide keyboard option after input the texts.
+    :param bool use_shell: Use 'mobile: shell' for the ASCII texts. (default=False)
+    :param lxml.etree._Element snapshot: Page source snapshot of the shell path to reuse. If it is None, take the
+        new snapshot. (default=None)
+    """
+    _shell_xpaths = []
+    if use_shell and is_shell_allowed(driver):
+        _shell_xpaths = [_xpath for _xpath, _text in fields.items() if _SHELL_TEXT_PATTERN.fullmatch(_text)]
+
+    _shell_args = []
+    if _shell_xpaths:
+        if snapshot is None:
+            # Wait for the form is rendered as enter_text does, and resolve all fields from one page source.
+            find_element(driver, _shell_xpaths[0])
+            snapshot = take_snapshot(driver)
+
+        for _xpath in _shell_xpaths:
+            _position = get_center_position(snapshot, _xpath)
+            if _shell_args:
+                _shell_args.extend([";", "input"])
+            _shell_args.extend(["tap", str(_position['x']), str(_position['y'])])
+
+            _current_text = get_text(snapshot, _xpath) if clear else ""
+            if _current_text:
+                # Move the cursor to the end (KEYCODE_MOVE_END) and delete the current text (KEYCODE_DEL).
+                _shell_args.extend([";", "input", "keyevent", "123", *(["67"] * len(_current_text))])
+            _shell_args.extend([";", "input", "text", _quote_shell_text(fields[_xpath])])
+
+    # Only the rejected shell falls back. (The other errors are raised, because the texts can be typed partly)
+    if _shell_args and not execute_shell(driver, "input", _shell_args):
+        _shell_xpaths = []
+
+    for _xpath, _text in fields.items():
+        if _xpath in _shell_xpaths:
+            continue
+        _target = find_element(driver, _xpath)
+        if clear:
+            _target.clear()
+        _target.send_keys(_text)
+
+    if hide and driver.is_keyboard_shown():
+        driver.hide_keyboard()
+    LOGGER.debug("Fill the %s fields is success. (%s fields through the shell)", len(fields), len(_shell_xpaths))
+
+
 # Back
-def back(driver) -> None:
+def back(driver, settle=None) -> None:
     """Go back.
 
     :param WebDriver driver: WebDriver obj.
+    :param Union[bool, float] settle: Wait for the UI idle after the action. (True or ceiling seconds, default=None)
     """
     driver.back()
+    settle_ui(driver, settle)
 
 
 # HW actions
@@ -67,6 +140,16 @@ def unlock_screen(driver):
         driver.unlock()
 
 
+def rotate_screen(driver, orientation="PORTRAIT"):
+    """Rotate screen.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str orientation: Target orientation (PORTRAIT, LANDSCAPE)
+    """
+    driver.orientation = orientation.upper()
+    observe_orientation(driver, orientation)
+
+
 def authenticate_fingerprint(driver, finger_id):
     """Authenticate users by using their fingerprint scans on supported 'Android emulators'.
 
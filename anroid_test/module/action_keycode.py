@@ -4,10 +4,12 @@ Keycode of Interactions. (https://milktea0614.tistory.com/75)
 Refer to https://developer.android.com/reference/android/view/KeyEvent#constants_1
 """
 
-import logging
-from miraelogger import Logger
+import time
 
-LOGGER = Logger(log_name=__name__, stream_log_level=logging.DEBUG)
+from anroid_test.module.async_logging import get_logger
+from anroid_test.module.shell import execute_shell
+
+LOGGER = get_logger(__name__)
 
 
 def go_to_back(driver):
@@ -115,10 +117,10 @@ def control_powerkey(driver, mode="sleep"):
     if mode == "sleep":
         driver.press_keycode(223)
     elif mode == "on":
-        LOGGER.warn("If the previous state was the power off, it may not work as you want.")
+        LOGGER.warning("If the previous state was the power off, it may not work as you want.")
         driver.press_keycode(224)
     elif mode == "off":
-        LOGGER.warn("You can see the power options. Be careful when using it.")
+        LOGGER.warning("You can see the power options. Be careful when using it.")
         driver.long_press_keycode(26)
 
 
@@ -136,3 +138,42 @@ def open_voice_assist(driver):
     :param WebDriver driver: WebDriver obj.
     """
     driver.press_keycode(231)
+
+
+def _build_shell_args(keycodes, interval) -> list:
+    """Build the 'input' shell arguments which press the keycodes in order.
+
+    :param list keycodes: Keycode list.
+    :param float interval: Delay between the keys, in seconds.
+    :return: Arguments of 'input' command.
+    :rtype: list.
+    """
+    if interval <= 0:
+        return ["keyevent", *(str(_keycode) for _keycode in keycodes)]
+
+    _args = ["keyevent", str(keycodes[0])]
+    for _keycode in keycodes[1:]:
+        _args.extend([";", "sleep", str(interval), ";", "input", "keyevent", str(_keycode)])
+    return _args
+
+
+def press_keycodes(driver, keycodes, interval=0.0):
+    """Press the keycodes in order through one 'mobile: shell' call.
+    If the shell is not allowed, press the keycodes one by one.
+
+    :param WebDriver driver: WebDriver obj.
+    :param list keycodes: Keycode list (e.g. [3, 187, 4])
+    :param float interval: Delay between the keys, in seconds. (default=0.0)
+    """
+    if len(keycodes) == 0:
+        return
+
+    if execute_shell(driver, "input", _build_shell_args(keycodes, interval)):
+        LOGGER.debug("Press the keycodes %s through the shell is success.", keycodes)
+        return
+
+    for _index, _keycode in enumerate(keycodes):
+        if _index > 0 and interval > 0:
+            time.sleep(interval)
+        driver.press_keycode(_keycode)
+    LOGGER.debug("Press the keycodes %s is success.", keycodes)
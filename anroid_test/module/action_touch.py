@@ -3,34 +3,53 @@
 (https://milktea0614.tistory.com/74)
 """
 
-import logging
-import math
 from typing import Union
 
-from miraelogger import Logger
-from appium.webdriver.common.appiumby import AppiumBy
-from appium.webdriver.common.touch_action import TouchAction
-from appium.webdriver.common.multi_action import MultiAction
-
 import selenium.common.exceptions
 
+from anroid_test.module.async_logging import get_logger
+from anroid_test.module.geometry import get_window_geometry
+from anroid_test.module.gesture import perform_repeated_stroke, scroll_stroke, swipe_stroke
+from anroid_test.module.locator import find_element
+from anroid_test.module.page_snapshot import get_center_position
+from anroid_test.module.wait import settle_ui
+
+LOGGER = get_logger(__name__)
+
+
+def _touch_action(driver):
+    """Return the new TouchAction.
+    TouchAction imports the whole appium.webdriver package, so it is imported on the first touch instead of the import
+    of this module.
 
-LOGGER = Logger(log_name=__name__, stream_log_level=logging.DEBUG)
+    :param WebDriver driver: WebDriver obj.
+    :return: TouchAction obj.
+    :rtype: TouchAction.
+    """
+    from appium.webdriver.common.touch_action import TouchAction
 
+    return TouchAction(driver)
 
-def touch(driver, xpath: Union[str, dict], timeout=1.0) -> None:
+
+def touch(driver, xpath: Union[str, dict], timeout=1.0, snapshot=None, settle=None) -> None:
     """Touch an element or position in current screen.
 
     :param WebDriver driver: WebDriver obj.
     :param Union[str, dict] xpath: Target element's xpath expression or Target position dictionary {"x": x, "y": y}.
-    :param float timeout: Waiting the timeout value to find element.
+    :param float timeout: Waiting the timeout value to find element. None keeps the current implicit wait.
+    :param lxml.etree._Element snapshot: Page source snapshot to resolve the xpath in local. (default=None)
+    :param Union[bool, float] settle: Wait for the UI idle after the action. (True or ceiling seconds, default=None)
     """
+    if isinstance(xpath, str) and snapshot is not None:
+        xpath = get_center_position(snapshot, xpath)
+
     if isinstance(xpath, str):
-        driver.implicitly_wait(timeout)
+        if timeout is not None:
+            driver.implicitly_wait(timeout)
         try:
-            _target = driver.find_element(by=AppiumBy.XPATH, value=xpath)
-            TouchAction(driver).tap(_target).perform()
-            LOGGER.debug(f"Touch the '{xpath}' is success.")
+            _target = find_element(driver, xpath)
+            _touch_action(driver).tap(_target).perform()
+            LOGGER.debug("Touch the '%s' is success.", xpath)
         except (selenium.common.exceptions.NoSuchElementException, RuntimeError) as e1:
             LOGGER.exception(msg := f"Touch the '{xpath}' is failed")
             raise e1(msg)
@@ -39,8 +58,8 @@ def touch(driver, xpath: Union[str, dict], timeout=1.0) -> None:
             raise TimeoutError(msg)
     elif isinstance(xpath, dict):
         try:
-            TouchAction(driver).tap(x=xpath['x'], y=xpath['y']).perform()
-            LOGGER.debug(f"Touch the '({xpath})' is success.")
+            _touch_action(driver).tap(x=xpath['x'], y=xpath['y']).perform()
+            LOGGER.debug("Touch the '(%s)' is success.", xpath)
         except Exception:
             LOGGER.exception(msg := f"Touch the '({xpath})' is failed.")
             raise Exception(msg)
@@ -48,21 +67,28 @@ def touch(driver, xpath: Union[str, dict], timeout=1.0) -> None:
         LOGGER.exception(msg := "Please check xpath parameter type is string or dict.")
         raise Exception(msg)
 
+    settle_ui(driver, settle)
 
-def double_touch(driver, xpath: Union[str, dict], timeout=1.0) -> None:
+
+def double_touch(driver, xpath: Union[str, dict], timeout=1.0, snapshot=None, settle=None) -> None:
     """Double tap an element in current screen.
 
     :param WebDriver driver: WebDriver obj.
     :param Union[str, dict] xpath: Target element's xpath expression or Target position dictionary {"x": x, "y": y}.
-    :param float timeout: Waiting the timeout value to find element.
+    :param float timeout: Waiting the timeout value to find element. None keeps the current implicit wait.
+    :param lxml.etree._Element snapshot: Page source snapshot to resolve the xpath in local. (default=None)
+    :param Union[bool, float] settle: Wait for the UI idle after the action. (True or ceiling seconds, default=None)
     """
+    if isinstance(xpath, str) and snapshot is not None:
+        xpath = get_center_position(snapshot, xpath)
 
     if isinstance(xpath, str):
-        driver.implicitly_wait(timeout)
+        if timeout is not None:
+            driver.implicitly_wait(timeout)
         try:
-            _target = driver.find_element(by=AppiumBy.XPATH, value=xpath)
-            TouchAction(driver).tap(_target, count=2).perform()
-            LOGGER.debug(f"Double-touch the '{xpath}' element is success.")
+            _target = find_element(driver, xpath)
+            _touch_action(driver).tap(_target, count=2).perform()
+            LOGGER.debug("Double-touch the '%s' element is success.", xpath)
         except (selenium.common.exceptions.NoSuchElementException, RuntimeError) as e1:
             LOGGER.exception(msg := f"Double-touch the '{xpath}' is failed")
             raise e1(msg)
@@ -71,8 +97,8 @@ def double_touch(driver, xpath: Union[str, dict], timeout=1.0) -> None:
             raise TimeoutError(msg)
     elif isinstance(xpath, dict):
         try:
-            TouchAction(driver).tap(x=xpath['x'], y=xpath['y'], count=2).perform()
-            LOGGER.debug(f"Double-touch the '{xpath}' position is success.")
+            _touch_action(driver).tap(x=xpath['x'], y=xpath['y'], count=2).perform()
+            LOGGER.debug("Double-touch the '%s' position is success.", xpath)
         except Exception:
             LOGGER.exception(msg := f"Double-touch the '{xpath}' is failed")
             raise Exception(msg)
@@ -80,20 +106,28 @@ def double_touch(driver, xpath: Union[str, dict], timeout=1.0) -> None:
         LOGGER.exception(msg := "Please check xpath parameter type is string or dict.")
         raise Exception(msg)
 
+    settle_ui(driver, settle)
+
 
-def long_press(driver, xpath: Union[str, dict], timeout=1.0) -> None:
+def long_press(driver, xpath: Union[str, dict], timeout=1.0, snapshot=None, settle=None) -> None:
     """Long press an element in current screen.
 
     :param WebDriver driver: WebDriver obj.
     :param Union[str, dict] xpath: Target element's xpath expression or Target position dictionary {"x": x, "y": y}.
-    :param float timeout: Waiting the timeout value to find element.
+    :param float timeout: Waiting the timeout value to find element. None keeps the current implicit wait.
+    :param lxml.etree._Element snapshot: Page source snapshot to resolve the xpath in local. (default=None)
+    :param Union[bool, float] settle: Wait for the UI idle after the action. (True or ceiling seconds, default=None)
     """
+    if isinstance(xpath, str) and snapshot is not None:
+        xpath = get_center_position(snapshot, xpath)
+
     if isinstance(xpath, str):
-        driver.implicitly_wait(timeout)
+        if timeout is not None:
+            driver.implicitly_wait(timeout)
         try:
-            _target = driver.find_element(by=AppiumBy.XPATH, value=xpath)
-            TouchAction(driver).long_press(_target).release().perform()
-            LOGGER.debug(f"Long-press the '{xpath}' is success.")
+            _target = find_element(driver, xpath)
+            _touch_action(driver).long_press(_target).release().perform()
+            LOGGER.debug("Long-press the '%s' is success.", xpath)
         except (selenium.common.exceptions.NoSuchElementException, RuntimeError) as ex:
             LOGGER.exception(msg := f"Long-press the '{xpath}' is failed")
             raise ex(msg)
@@ -102,8 +136,8 @@ def long_press(driver, xpath: Union[str, dict], timeout=1.0) -> None:
             raise TimeoutError(msg)
     elif isinstance(xpath, dict):
         try:
-            TouchAction(driver).long_press(x=xpath['x'], y=xpath['y']).release().perform()
-            LOGGER.debug(f"Long-press the '{xpath}' is success.")
+            _touch_action(driver).long_press(x=xpath['x'], y=xpath['y']).release().perform()
+            LOGGER.debug("Long-press the '%s' is success.", xpath)
         except Exception:
             LOGGER.exception(msg := f"Long-press the {xpath} is failed.")
             raise Exception(msg)
@@ -111,162 +145,144 @@ def long_press(driver, xpath: Union[str, dict], timeout=1.0) -> None:
         LOGGER.exception(msg := "Please check xpath parameter type is string or dict.")
         raise Exception(msg)
 
+    settle_ui(driver, settle)
+
 
-def scroll(driver, direction="up", times=1, x_position=None) -> None:
+def scroll(driver, direction="up", times=1, x_position=None, settle=None) -> None:
     """Scroll the screen.
 
     :param WebDriver driver: WebDriver obj.
     :param str direction: Scroll direction string. (up, down)
     :param int times: Scroll repeat times. (default=1)
     :param int x_position: Standard X position. (default=None)
+    :param Union[bool, float] settle: Wait for the UI idle after the action. (True or ceiling seconds, default=None)
     """
     if direction.lower() not in ["up", "down"]:
         LOGGER.exception(msg := "Please check the 'direction' value. The 'direction' value must be in ['up', 'down']")
         raise ValueError(msg)
 
-    _window_size = driver.get_window_size()
-    _width = _window_size['width']
-    _height = _window_size['height']
-
-    if x_position is None:
-        x_position = int(_width / 2)
+    _start, _end = scroll_stroke(get_window_geometry(driver), direction, x_position)
 
     try:
-        for _ in range(times):
-            if direction.lower() == "up":
-                TouchAction(driver).press(x=x_position, y=int(_height / 2)).wait(100).move_to(x=x_position, y=int(
-                    _height / 4)).release().perform()
-            elif direction.lower() == "down":
-                TouchAction(driver).press(x=x_position, y=int(_height / 2)).wait(100).move_to(x=x_position, y=int(
-                    _height / 4 * 3)).release().perform()
-        LOGGER.debug(f"Scroll to {direction} is finish.")
+        perform_repeated_stroke(driver, _start, _end, times)
+        LOGGER.debug("Scroll to %s is finish.", direction)
     except Exception:
         LOGGER.exception(msg := f"Could not scroll to {direction}.")
         raise Exception(msg)
 
+    settle_ui(driver, settle)
 
-def swipe(driver, direction="right", times=1, y_position=None) -> None:
+
+def swipe(driver, direction="right", times=1, y_position=None, settle=None) -> None:
     """Swipe the screen.
 
     :param WebDriver driver: WebDriver obj.
     :param str direction: Swipe direction string. (right, left)
     :param int times: Swipe repeat times. (default=1)
     :param int y_position: Standard Y position. (default=None)
+    :param Union[bool, float] settle: Wait for the UI idle after the action. (True or ceiling seconds, default=None)
     """
     if direction.lower() not in ["right", "left"]:
         LOGGER.exception(
             msg := "Please check the 'direction' value. The 'direction' value must be in ['right', 'left']")
         raise ValueError(msg)
 
-    _window_size = driver.get_window_size()
-    _width = _window_size['width']
-    _height = _window_size['height']
-
-    if y_position is None:
-        y_position = int(_height / 2)
+    _start, _end = swipe_stroke(get_window_geometry(driver), direction, y_position)
 
     try:
-        for _ in range(times):
-            if direction.lower() == "left":
-                TouchAction(driver).press(x=int(_width / 2), y=y_position).wait(100).move_to(x=int(_width / 4),
-                                                                                                  y=y_position).release().perform()
-            elif direction.lower() == "right":
-                TouchAction(driver).press(x=int(_width / 2), y=y_position).wait(100).move_to(x=int(_width / 4 * 3),
-                                                                                                  y=y_position).release().perform()
-
-        LOGGER.debug(f"Swipe to {direction} is finish.")
+        perform_repeated_stroke(driver, _start, _end, times)
+        LOGGER.debug("Swipe to %s is finish.", direction)
     except Exception:
         LOGGER.exception(msg := f"Could not swipe to {direction}.")
         raise Exception(msg)
 
+    settle_ui(driver, settle)
 
-def pinch_in(driver, times=1) -> None:
-    """Pinch-In(=to reduce) the current screen.
+
+def _build_finger(driver, path):
+    """Build the TouchAction of one finger which follows the path.
 
     :param WebDriver driver: WebDriver obj.
-    :param int times: Pinch times.
+    :param tuple path: Finger path ((x, y), ...).
+    :return: TouchAction of the finger.
+    :rtype: TouchAction.
     """
-    _window_size = driver.get_window_size()
-    standard_x = int(_window_size['width'] / 2)
-    standard_y = int(_window_size['height'] / 2)
+    _finger = _touch_action(driver)
+    _finger.press(x=path[0][0], y=path[0][1])
+    if len(path) > 1:
+        _finger.wait(50)
+        for _x, _y in path[1:]:
+            _finger.move_to(x=_x, y=_y)
+    return _finger.release()
 
-    _max_distance = int(math.sqrt(math.pow(standard_x,2) + math.pow(standard_y, 2)) / 2)
-    _min_distance = int(math.sqrt(math.pow(standard_x,2) + math.pow(standard_y, 2)) / 5)
 
-    _x1_start = int(standard_x + (_max_distance * math.cos(math.radians(45))))
-    _y1_start = int(standard_y + (_max_distance * math.sin(math.radians(45))))
-    _x1_end = int(standard_x + (_min_distance * math.cos(math.radians(45))))
-    _y1_end = int(standard_y + (_min_distance * math.sin(math.radians(45))))
-
-    _finger1 = TouchAction(driver)
-    _finger1.press(x=_x1_start, y=_y1_start).wait(50).move_to(x=_x1_end, y=_y1_end).release()
+def pinch_in(driver, times=1, fingers=2, points=2, settle=None) -> None:
+    """Pinch-In(=to reduce) the current screen.
 
-    _x2_start = int(standard_x + (_max_distance * math.cos(math.radians(225))))
-    _y2_start = int(standard_y + (_max_distance * math.sin(math.radians(225))))
-    _x2_end = int(standard_x + (_min_distance * math.cos(math.radians(225))))
-    _y2_end = int(standard_y + (_min_distance * math.sin(math.radians(225))))
+    :param WebDriver driver: WebDriver obj.
+    :param int times: Pinch times.
+    :param int fingers: The number of fingers. (default=2)
+    :param int points: The number of points of each finger path. (default=2)
+    :param Union[bool, float] settle: Wait for the UI idle after the action. (True or ceiling seconds, default=None)
+    """
+    from appium.webdriver.common.multi_action import MultiAction
+    from anroid_test.module.gesture_path import pinch_paths
 
-    _finger2 = TouchAction(driver)
-    _finger2.press(x=_x2_start, y=_y2_start).wait(50).move_to(x=_x2_end, y=_y2_end).release()
+    _window_size = get_window_geometry(driver)
+    _fingers = [_build_finger(driver, _path)
+                for _path in pinch_paths(_window_size['width'], _window_size['height'], "in", fingers, points)]
 
     _multi_touch = MultiAction(driver)
     try:
         for i in range(times):
-            _multi_touch.add(_finger1, _finger2)
+            _multi_touch.add(*_fingers)
             _multi_touch.perform()
-        LOGGER.debug(f"Pinch-In is finish.")
+        LOGGER.debug("Pinch-In is finish.")
     except selenium.common.exceptions.WebDriverException:
         LOGGER.exception(msg := f"Could not Pinch-In.")
         raise selenium.common.exceptions.WebDriverException(msg)
 
+    settle_ui(driver, settle)
+
 
-def pinch_out(driver, times=1) -> None:
+def pinch_out(driver, times=1, fingers=2, points=2, settle=None) -> None:
     """Pinch-Out(=to large) the current screen.
 
     :param WebDriver driver: WebDriver obj.
     :param int times: Pinch times.
+    :param int fingers: The number of fingers. (default=2)
+    :param int points: The number of points of each finger path. (default=2)
+    :param Union[bool, float] settle: Wait for the UI idle after the action. (True or ceiling seconds, default=None)
     """
-    _window_size = driver.get_window_size()
-    standard_x = int(_window_size['width'] / 2)
-    standard_y = int(_window_size['height'] / 2)
-
-    _max_distance = int(math.sqrt(math.pow(standard_x, 2) + math.pow(standard_y, 2)) / 2)
-    _min_distance = int(math.sqrt(math.pow(standard_x, 2) + math.pow(standard_y, 2)) / 5)
-
-    _x1_start = int(standard_x + (_min_distance * math.cos(math.radians(45))))
-    _y1_start = int(standard_y + (_min_distance * math.sin(math.radians(45))))
-    _x1_end = int(standard_x + (_max_distance * math.cos(math.radians(45))))
-    _y1_end = int(standard_y + (_max_distance * math.sin(math.radians(45))))
+    from appium.webdriver.common.multi_action import MultiAction
+    from anroid_test.module.gesture_path import pinch_paths
 
-    _finger1 = TouchAction(driver)
-    _finger1.press(x=_x1_start, y=_y1_start).wait(50).move_to(x=_x1_end, y=_y1_end).release()
-
-    _x2_start = int(standard_x + (_min_distance * math.cos(math.radians(225))))
-    _y2_start = int(standard_y + (_min_distance * math.sin(math.radians(225))))
-    _x2_end = int(standard_x + (_max_distance * math.cos(math.radians(225))))
-    _y2_end = int(standard_y + (_max_distance * math.sin(math.radians(225))))
-
-    _finger2 = TouchAction(driver)
-    _finger2.press(x=_x2_start, y=_y2_start).wait(50).move_to(x=_x2_end, y=_y2_end).release()
+    _window_size = get_window_geometry(driver)
+    _fingers = [_build_finger(driver, _path)
+                for _path in pinch_paths(_window_size['width'], _window_size['height'], "out", fingers, points)]
 
     _multi_touch = MultiAction(driver)
     try:
         for _ in range(times):
-            _multi_touch.add(_finger1, _finger2)
+            _multi_touch.add(*_fingers)
             _multi_touch.perform()
-        LOGGER.debug(f"Pinch-Out is finish.")
+        LOGGER.debug("Pinch-Out is finish.")
     except selenium.common.exceptions.WebDriverException:
         LOGGER.exception(msg := f"Could not Pinch-Out.")
         raise selenium.common.exceptions.WebDriverException(msg)
 
+    settle_ui(driver, settle)
 
-def rotate(driver, degree=45, direction="clockwise", times=1) -> None:
+
+def rotate(driver, degree=45, direction="clockwise", times=1, fingers=2, settle=None) -> None:
     """Rotate degree gesture.
 
     :param WebDriver driver: WebDriver obj.
     :param int degree: Rotation degree value which is from 5 to 180 and must be divisible by 5. (default=45).
     :param str direction: Rotation direction (clockwise, counterclockwise).
     :param int times: Rotate times.
+    :param int fingers: The number of fingers including the pivot finger on the center. (default=2)
+    :param Union[bool, float] settle: Wait for the UI idle after the action. (True or ceiling seconds, default=None)
     """
     if direction.lower() not in ["clockwise", "counterclockwise"]:
         LOGGER.exception(msg := "Please check the 'direction' value. "
@@ -278,41 +294,22 @@ def rotate(driver, degree=45, direction="clockwise", times=1) -> None:
                                       "The 'degree' must be from 5 to 180 and must be divisible by 5.")
         raise ValueError(msg)
 
-    _window_size = driver.get_window_size()
-    standard_x = int(_window_size['width'] / 2)
-    standard_y = int(_window_size['height'] / 2)
-
-    _distance = (standard_x / 4 * 3) if (standard_x / 4 * 3) < (standard_y / 4 * 3) else (standard_y / 4 * 3)
-
-    # create move position
-    _x_list = []
-    _y_list = []
-    _move_times = int(degree / 5) + 1
-    for i in range(_move_times):
-        if direction == "clockwise":
-            _x_list.append(int(standard_x + (_distance * math.cos(math.radians(5 * i + 45)))))
-            _y_list.append(int(standard_y + (_distance * math.sin(math.radians(5 * i + 45)))))
-        elif direction == "counterclockwise":
-            _x_list.append(int(standard_x - (_distance * math.cos(math.radians(225 - 5 * i)))))
-            _y_list.append(int(standard_y - (_distance * math.sin(math.radians(225 - 5 * i)))))
-
-    # Init TouchActions
-    _finger1 = TouchAction(driver)
-    _finger2 = TouchAction(driver)
-
-    _finger1.press(x=standard_x, y=standard_y).release()
-    _finger2.press(x=_x_list[0], y=_y_list[0]).wait(50)
-    for i in range(1, _move_times):
-        _finger2.move_to(x=_x_list[i], y=_y_list[i])
-    _finger2.release()
+    from appium.webdriver.common.multi_action import MultiAction
+    from anroid_test.module.gesture_path import rotate_paths
+
+    _window_size = get_window_geometry(driver)
+    _fingers = [_build_finger(driver, _path)
+                for _path in rotate_paths(_window_size['width'], _window_size['height'], degree, direction.lower(),
+                                          fingers)]
 
     _multi_touch = MultiAction(driver)
     try:
         for _ in range(times):
-            _multi_touch.add(_finger1, _finger2)
+            _multi_touch.add(*_fingers)
             _multi_touch.perform()
-        LOGGER.debug(f"Rotate {degree} degrees ({direction}) is finish.")
+        LOGGER.debug("Rotate %s degrees (%s) is finish.", degree, direction)
     except selenium.common.exceptions.WebDriverException:
         LOGGER.exception(msg := f"Could not Rotate {degree} degrees ({direction}).")
         raise selenium.common.exceptions.WebDriverException(msg)
 
+    settle_ui(driver, settle)
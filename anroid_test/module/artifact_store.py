@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""Content-addressed artifact store.
+Store each unique page source and screenshot once, and keep the index of which step referenced which blob.
+
+Layout of the store directory:
+    objects/<2 hex>/<sha256>.gz        Compressed page source.
+    objects/<2 hex>/<sha256>.delta.gz  Compressed line diff of the page source against the base page source.
+    objects/<2 hex>/<sha256>.png       Screenshot. (PNG is already compressed)
+    index.jsonl                        One line per dump {"step", "time", "page", "screenshot"}.
+"""
+import datetime
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Store the full page source instead of the delta which would be this number of deltas deep, to keep the loading fast.
+MAX_DELTA_CHAIN = 20
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _make_delta(base_text, text) -> list:
+    """Make the line diff operations which convert the base text to the text.
+
+    :param str base_text: Base text.
+    :param str text: Target text.
+    :return: Operation list [["=", start, end] or ["+", start, end, lines], ...].
+    :rtype: list.
+    """
+    _base_lines = base_text.splitlines(keepends=True)
+    _lines = text.splitlines(keepends=True)
+    _operations = []
+    for _tag, _i1, _i2, _j1, _j2 in difflib.SequenceMatcher(None, _base_lines, _lines, autojunk=False).get_opcodes():
+        if _tag == "equal":
+            _operations.append(["=", _i1, _i2])
+        else:
+            _operations.append(["+", _i1, _i2, _lines[_j1:_j2]])
+    return _operations
+
+
+def _apply_delta(base_text, operations) -> str:
+    """Apply the line diff operations to the base text.
+
+    :param str base_text: Base text.
+    :param list operations: Operation list from _make_delta().
+    :return: Target text.
+    :rtype: str.
+    """
+    _base_lines = base_text.splitlines(keepends=True)
+    _lines = []
+    for _operation in operations:
+        if _operation[0] == "=":
+            _lines.extend(_base_lines[_operation[1]:_operation[2]])
+        else:
+            _lines.extend(_operation[3])
+    return "".join(_lines)
+
+
+class ArtifactStore:
+    """Content-addressed store of the UI dumps."""
+
+    def __init__(self, directory_path, xml_delta=True):
+        """Initialize the ArtifactStore.
+
+        :param str directory_path: Store directory path.
+        :param bool xml_delta: Store the page source as the diff against the previous page source. (default=True)
+        """
+        self._directory_path = directory_path
+        self._xml_delta = xml_delta
+        self._previous_page = None
+        # {digest: the number of deltas to apply from the full page source}
+        self._chain_depths = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory_path, "objects"), exist_ok=True)
+
+    @property
+    def index_path(self) -> str:
+        """Index file path."""
+        return os.path.join(self._directory_path, "index.jsonl")
+
+    def _object_path(self, digest, suffix) -> str:
+        """Return the object file path.
+
+        :param str digest: Content hash.
+        :param str suffix: File suffix (.gz, .delta.gz, .png)
+        :return: Object file path.
+        :rtype: str.
+        """
+        return os.path.join(self._directory_path, "objects", digest[:2], f"{digest}{suffix}")
+
+    def _write_object(self, digest, suffix, data):
+        """Write the object file atomically.
+
+        :param str digest: Content hash.
+        :param str suffix: File suffix (.gz, .delta.gz, .png)
+        :param bytes data: Object data.
+        """
+        _path = self._object_path(digest, suffix)
+        os.makedirs(os.path.dirname(_path), exist_ok=True)
+        _temp_path = f"{_path}.tmp"
+        with open(_temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(_temp_path, _path)
+
+    def _has_page(self, digest) -> bool:
+        """Check the page source is stored."""
+        return os.path.exists(self._object_path(digest, ".gz")) or \
+            os.path.exists(self._object_path(digest, ".delta.gz"))
+
+    def _chain_depth(self, digest) -> int:
+        """Return the number of deltas to apply from the full page source. It must be called with the lock.
+
+        :param str digest: Content hash of the stored page source.
+        :return: Chain depth. (0 for the full page source)
+        :rtype: int.
+        """
+        # The pages stored before the store is opened are read from the delta files.
+        _chain = []
+        while digest not in self._chain_depths:
+            _path = self._object_path(digest, ".delta.gz")
+            if not os.path.exists(_path):
+                self._chain_depths[digest] = 0
+                break
+            _chain.append(digest)
+            with open(_path, 'rb') as f:
+                digest = json.loads(gzip.decompress(f.read()))['base']
+
+        _depth = self._chain_depths[digest]
+        for _digest in reversed(_chain):
+            _depth += 1
+            self._chain_depths[_digest] = _depth
+        return _depth
+
+    def put_page(self, page_source) -> str:
+        """Store the page source once.
+
+        :param str page_source: Page source.
+        :return: Content hash of the page source.
+        :rtype: str.
+        """
+        _data = page_source.encode('utf-8')
+        _digest = hashlib.sha256(_data).hexdigest()
+        with self._lock:
+            if not self._has_page(_digest):
+                _full = gzip.compress(_data)
+                _delta = None
+                _depth = 0
+                if self._xml_delta and self._previous_page is not None:
+                    # The previous page can be the revisited page, so the depth of its own chain is used.
+                    _base_digest, _base_text = self._previous_page
+                    _depth = self._chain_depth(_base_digest) + 1
+                    if _depth < MAX_DELTA_CHAIN:
+                        _delta = gzip.compress(json.dumps(
+                            {"base": _base_digest, "operations": _make_delta(_base_text, page_source)},
+                            ensure_ascii=False).encode('utf-8'))
+
+                if _delta is not None and len(_delta) < len(_full):
+                    self._write_object(_digest, ".delta.gz", _delta)
+                    self._chain_depths[_digest] = _depth
+                else:
+                    self._write_object(_digest, ".gz", _full)
+                    self._chain_depths[_digest] = 0
+            self._previous_page = (_digest, page_source)
+        return _digest
+
+    def put_screenshot(self, png) -> str:
+        """Store the screenshot once.
+
+        :param bytes png: Screenshot PNG bytes.
+        :return: Content hash of the screenshot.
+        :rtype: str.
+        """
+        _digest = hashlib.sha256(png).hexdigest()
+        with self._lock:
+            if not os.path.exists(self._object_path(_digest, ".png")):
+                self._write_object(_digest, ".png", png)
+        return _digest
+
+    def add_dump(self, page_source, png, step=None) -> dict:
+        """Store the UI dump and append the index record.
+
+        :param str page_source: Page source.
+        :param bytes png: Screenshot PNG bytes.
+        :param str step: Step name which references the dump. (default=None)
+        :return: Index record {"step", "time", "page", "screenshot"}.
+        :rtype: dict.
+        """
+        _record = {
+            "step": step,
+            "time": datetime.datetime.now().isoformat(timespec="microseconds"),
+            "page": self.put_page(page_source),
+            "screenshot": self.put_screenshot(png),
+        }
+        with self._lock:
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(_record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        return _record
+
+    def get_page(self, digest) -> str:
+        """Load the page source.
+
+        :param str digest: Content hash of the page source.
+        :return: Page source.
+        :rtype: str.
+        """
+        _path = self._object_path(digest, ".gz")
+        if os.path.exists(_path):
+            with open(_path, 'rb') as f:
+                return gzip.decompress(f.read()).decode('utf-8')
+
+        with open(self._object_path(digest, ".delta.gz"), 'rb') as f:
+            _delta = json.loads(gzip.decompress(f.read()))
+        return _apply_delta(self.get_page(_delta['base']), _delta['operations'])
+
+    def get_screenshot(self, digest) -> bytes:
+        """Load the screenshot.
+
+        :param str digest: Content hash of the screenshot.
+        :return: Screenshot PNG bytes.
+        :rtype: bytes.
+        """
+        with open(self._object_path(digest, ".png"), 'rb') as f:
+            return f.read()
+
+    def read_index(self) -> list:
+        """Read all index records.
+
+        :return: Index record list.
+        :rtype: list.
+        """
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            return [json.loads(_line) for _line in f if _line.strip()]
+
+
+def get_artifact_store(directory_path, xml_delta=True) -> ArtifactStore:
+    """Return the artifact store of the directory. The store is shared in the process.
+
+    :param str directory_path: Store directory path.
+    :param bool xml_delta: Store the page source as the diff against the previous page source. (default=True)
+    :return: ArtifactStore obj.
+    :rtype: ArtifactStore.
+    """
+    _key = os.path.abspath(directory_path)
+    with _stores_lock:
+        if _key not in _stores:
+            _stores[_key] = ArtifactStore(directory_path, xml_delta)
+            LOGGER.debug("Open the artifact store '%s'.", directory_path)
+        return _stores[_key]
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""asyncio facade of the action modules.
+Every public function of action_touch, action_keycode, action_additional, network and screencapture is mirrored
+as a coroutine function which runs on the bounded executor. (e.g. await touch(driver, xpath))
+
+The calls on the different drivers run at the same time. The calls on the same driver are not ordered,
+so await them one by one when the order matters.
+"""
+import asyncio
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from anroid_test.module import action_additional, action_keycode, action_touch, network, screencapture
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+DEFAULT_MAX_WORKERS = 16
+
+_MIRRORED_MODULES = (action_touch, action_keycode, action_additional, network, screencapture)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def set_max_workers(max_workers) -> None:
+    """Set the maximum number of the blocking calls which run at the same time.
+
+    :param int max_workers: The number of executor workers.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async_actions")
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the executor. It is created at the first call.
+
+    :return: ThreadPoolExecutor obj.
+    :rtype: ThreadPoolExecutor.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="async_actions")
+        return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run the blocking function on the executor.
+
+    :param callable func: Blocking function.
+    :return: Return value of the function.
+    """
+    _loop = asyncio.get_running_loop()
+    return await _loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def _mirror(func):
+    """Make the coroutine function which mirrors the blocking function.
+
+    :param callable func: Blocking function.
+    :return: Coroutine function.
+    :rtype: callable.
+    """
+    @functools.wraps(func)
+    async def _coroutine(*args, **kwargs):
+        return await run_blocking(func, *args, **kwargs)
+
+    return _coroutine
+
+
+__all__ = ["set_max_workers", "run_blocking"]
+for _module in _MIRRORED_MODULES:
+    for _name, _func in inspect.getmembers(_module, inspect.isfunction):
+        if _func.__module__ == _module.__name__ and not _name.startswith('_'):
+            globals()[_name] = _mirror(_func)
+            __all__.append(_name)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""Asynchronous logging of the action modules.
+Move the formatting and the stream writing of the module loggers into one background thread,
+and keep the recent DEBUG records in the ring buffer which is written only when the ERROR record is logged.
+
+All loggers of anroid_test.module are switched, and the stream handler which miraelogger adds to the module imported
+later is switched too, so the module does not write the records twice.
+The modules log with get_logger() and the %-style arguments, so the message is also formatted in the background thread.
+
+    enable_async_logging()
+    ...
+    disable_async_logging()
+"""
+import collections
+import logging
+import logging.handlers
+import queue
+import threading
+
+from miraelogger import LOG_FMT, LOG_TIME_FMT, Logger
+
+MODULE_LOGGER_PREFIX = "anroid_test.module."
+DEFAULT_RING_SIZE = 1000
+
+_state_lock = threading.Lock()
+_listener = None
+_ring_handler = None
+_queue_handler = None
+# Logger names to switch, or None for all loggers of anroid_test.module.
+_target_names = None
+_original_handlers = {}
+_original_logger_class = None
+
+
+def get_logger(name, stream_log_level=logging.DEBUG) -> logging.Logger:
+    """Return the logger which has the stream handler of miraelogger.
+    The miraelogger methods take only the message, so the standard logger is returned to pass the %-style arguments.
+
+    :param str name: Logger name. (e.g. __name__)
+    :param int stream_log_level: Stream log level. (default=logging.DEBUG)
+    :return: Logger obj.
+    :rtype: logging.Logger.
+    """
+    Logger(log_name=name, stream_log_level=stream_log_level)
+    return logging.getLogger(name)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler which does not format the record in the caller thread."""
+
+    def prepare(self, record):
+        """Return the record as it is. The listener thread formats it.
+
+        :param logging.LogRecord record: Log record.
+        :return: Log record.
+        :rtype: logging.LogRecord.
+        """
+        return record
+
+
+class RingBufferHandler(logging.Handler):
+    """Keep the recent records in the bounded ring, and write them into the target when the failure is logged."""
+
+    def __init__(self, target, capacity=DEFAULT_RING_SIZE, flush_level=logging.ERROR):
+        """Initialize the RingBufferHandler.
+
+        :param logging.Handler target: Handler which writes the records when the ring is flushed.
+        :param int capacity: The maximum number of the kept records. (default=1000)
+        :param int flush_level: Log level which flushes the ring. (default=logging.ERROR)
+        """
+        super().__init__(logging.DEBUG)
+        self.target = target
+        self.flush_level = flush_level
+        self.buffer = collections.deque(maxlen=capacity)
+
+    def emit(self, record):
+        """Keep the record. Flush the ring if the record is the failure.
+
+        :param logging.LogRecord record: Log record.
+        """
+        self.buffer.append(record)
+        if record.levelno >= self.flush_level:
+            self.flush()
+
+    def flush(self):
+        """Write the kept records into the target, except the ones which the target already wrote."""
+        self.acquire()
+        try:
+            _records = list(self.buffer)
+            self.buffer.clear()
+        finally:
+            self.release()
+
+        for _record in _records:
+            if _record.levelno < self.target.level:
+                self.target.handle(_record)
+        self.target.flush()
+
+
+def _is_target(logger_name) -> bool:
+    """Check the logger is switched to the queue handler.
+
+    :param str logger_name: Logger name.
+    :return: True if the logger is the target module logger.
+    :rtype: bool.
+    """
+    if _target_names is not None:
+        return logger_name in _target_names
+    return logger_name.startswith(MODULE_LOGGER_PREFIX)
+
+
+def _switch_handlers(logger):
+    """Keep the handlers of the logger and replace them with the queue handler.
+
+    :param logging.Logger logger: Module logger.
+    """
+    _original_handlers.setdefault(logger.name, []).extend(logger.handlers)
+    for _handler in logger.handlers[:]:
+        logging.Logger.removeHandler(logger, _handler)
+    logging.Logger.addHandler(logger, _queue_handler)
+
+
+class _ModuleLogger(logging.Logger):
+    """Logger which keeps the handler added while the asynchronous logging is enabled. (e.g. The module is imported
+    after enable_async_logging())"""
+
+    def addHandler(self, hdlr):
+        if _listener is None or hdlr is _queue_handler or not _is_target(self.name):
+            super().addHandler(hdlr)
+            return
+
+        _original_handlers.setdefault(self.name, []).append(hdlr)
+        if _queue_handler not in self.handlers:
+            super().addHandler(_queue_handler)
+
+
+def enable_async_logging(module_names=None, stream_log_level=logging.INFO,
+                         ring_size=DEFAULT_RING_SIZE, flush_level=logging.ERROR):
+    """Replace the stream handlers of the module loggers with the queue handler.
+
+    :param tuple module_names: Module names in anroid_test.module. (default=None, all modules including the modules
+        which are imported later)
+    :param int stream_log_level: Log level which is written into the stream immediately. (default=logging.INFO)
+    :param int ring_size: The number of the recent records which are kept in the ring. (default=1000)
+    :param int flush_level: Log level which writes the ring into the stream. (default=logging.ERROR)
+    """
+    global _listener, _ring_handler, _queue_handler, _target_names, _original_logger_class
+
+    with _state_lock:
+        if _listener is not None:
+            return
+
+        _stream_handler = logging.StreamHandler()
+        _stream_handler.setFormatter(logging.Formatter(LOG_FMT, LOG_TIME_FMT))
+        _stream_handler.setLevel(stream_log_level)
+        _ring_handler = RingBufferHandler(_stream_handler, ring_size, flush_level)
+
+        _queue = queue.SimpleQueue()
+        _queue_handler = DeferredQueueHandler(_queue)
+        _target_names = None if module_names is None else \
+            {f"{MODULE_LOGGER_PREFIX}{_module_name}" for _module_name in module_names}
+        _loggers = [_logger for _name, _logger in list(logging.Logger.manager.loggerDict.items())
+                    if isinstance(_logger, logging.Logger) and _is_target(_name)]
+        for _logger in _loggers:
+            _switch_handlers(_logger)
+        # The loggers of the modules which are imported later are created as _ModuleLogger.
+        _original_logger_class = logging.getLoggerClass()
+        logging.setLoggerClass(_ModuleLogger)
+
+        # The ring is handled first, so the flushed records are written before the failure record.
+        _listener = logging.handlers.QueueListener(_queue, _ring_handler, _stream_handler,
+                                                   respect_handler_level=True)
+        _listener.start()
+
+
+def flush_ring():
+    """Write the records in the ring into the stream. (e.g. When the scenario is failed without the ERROR log)"""
+    if _ring_handler is not None:
+        _ring_handler.flush()
+
+
+def disable_async_logging():
+    """Stop the listener thread and restore the stream handlers of the module loggers."""
+    global _listener, _ring_handler, _queue_handler, _target_names, _original_logger_class
+
+    with _state_lock:
+        if _listener is None:
+            return
+
+        _listener.stop()
+        logging.setLoggerClass(_original_logger_class)
+        _listener = None
+        for _logger_name, _handlers in _original_handlers.items():
+            _logger = logging.getLogger(_logger_name)
+            _logger.removeHandler(_queue_handler)
+            for _handler in _handlers:
+                _logger.addHandler(_handler)
+        _original_handlers.clear()
+        _ring_handler = None
+        _queue_handler = None
+        _target_names = None
+        _original_logger_class = None
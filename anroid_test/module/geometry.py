@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""Window geometry cache.
+Keep the window size per session and reuse it until the orientation or the activity is changed.
+The cache is dropped when the orientation is set or the app can be switched through the driver (rotate_screen,
+driver.orientation, start_activity, activate_app, terminate_app, back, HOME/BACK/APP_SWITCH keycodes).
+The rotation which the app forces itself is not seen without a request, so call invalidate_geometry() after it.
+"""
+import threading
+
+from appium.webdriver.mobilecommand import MobileCommand
+from selenium.webdriver.remote.command import Command
+
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Margin ratio of the safe gesture region (avoid the status bar and the navigation gesture area)
+SAFE_MARGIN_RATIO = 0.1
+
+# {session_id: {"geometry": dict, "activity": str}}
+_GEOMETRY_CACHE = {}
+_LOCK = threading.Lock()
+
+# Commands and extension scripts which change the orientation or can switch the app.
+_INVALIDATING_COMMANDS = {
+    "setScreenOrientation", MobileCommand.START_ACTIVITY, MobileCommand.ACTIVATE_APP, MobileCommand.TERMINATE_APP,
+    MobileCommand.LAUNCH_APP, MobileCommand.CLOSE_APP, MobileCommand.BACKGROUND, Command.GO_BACK,
+}
+_INVALIDATING_SCRIPTS = {
+    "mobile: startActivity", "mobile: activateApp", "mobile: terminateApp", "mobile: backgroundApp",
+}
+# Keycodes which can switch the app. (HOME, BACK, APP_SWITCH)
+_SWITCHING_KEYCODES = {3, 4, 187}
+# Shell commands which can switch the app. (e.g. input keyevent 3, am start -n ...)
+_SWITCHING_SHELL_COMMANDS = {"am", "input", "monkey"}
+
+
+def _build_geometry(width, height) -> dict:
+    """Build the geometry dictionary from the window size.
+
+    :param int width: Window width.
+    :param int height: Window height.
+    :return: Geometry dictionary.
+    :rtype: dict.
+    """
+    _margin_x = int(width * SAFE_MARGIN_RATIO)
+    _margin_y = int(height * SAFE_MARGIN_RATIO)
+
+    return {
+        "width": width,
+        "height": height,
+        "orientation": "LANDSCAPE" if width > height else "PORTRAIT",
+        "center": {"x": int(width / 2), "y": int(height / 2)},
+        "quarter": {
+            "top": {"x": int(width / 2), "y": int(height / 4)},
+            "bottom": {"x": int(width / 2), "y": int(height / 4 * 3)},
+            "left": {"x": int(width / 4), "y": int(height / 2)},
+            "right": {"x": int(width / 4 * 3), "y": int(height / 2)},
+        },
+        "safe_region": {
+            "left": _margin_x,
+            "top": _margin_y,
+            "right": width - _margin_x,
+            "bottom": height - _margin_y,
+        },
+    }
+
+
+def _invalidates_geometry(command, params) -> bool:
+    """Check the command changes the orientation or can switch the app.
+
+    :param str command: Command name.
+    :param dict params: Command parameters.
+    :return: True if the geometry must be invalidated after the command.
+    :rtype: bool.
+    """
+    params = params or {}
+    if command in _INVALIDATING_COMMANDS:
+        return True
+    if command in [MobileCommand.PRESS_KEYCODE, MobileCommand.LONG_PRESS_KEYCODE]:
+        return params.get('keycode') in _SWITCHING_KEYCODES
+    if command != Command.W3C_EXECUTE_SCRIPT:
+        return False
+
+    _script = params.get('script')
+    _args = params.get('args') or [{}]
+    _arguments = _args[0] if isinstance(_args[0], dict) else {}
+    if _script in _INVALIDATING_SCRIPTS:
+        return True
+    if _script == "mobile: pressKey":
+        return _arguments.get('keycode') in _SWITCHING_KEYCODES
+    return _script == "mobile: shell" and _arguments.get('command') in _SWITCHING_SHELL_COMMANDS
+
+
+def _watch_commands(driver) -> None:
+    """Wrap the command executor of the driver to invalidate the geometry when the orientation is set or the app can
+    be switched.
+
+    :param WebDriver driver: WebDriver obj.
+    """
+    _executor = driver.command_executor
+    if getattr(_executor, '__geometry_watched__', False):
+        return
+
+    _execute = _executor.execute
+
+    def _watching_execute(command, params):
+        # The session id is removed from the parameters by the executor.
+        _session_id = (params or {}).get('sessionId')
+        _invalidate = _invalidates_geometry(command, params)
+        _response = _execute(command, params)
+        if _invalidate:
+            with _LOCK:
+                _entry = _GEOMETRY_CACHE.get(_session_id)
+                if _entry is not None:
+                    _entry['geometry'] = None
+            LOGGER.debug("'%s' can change the window. Invalidate the window geometry.", command)
+        return _response
+
+    _executor.execute = _watching_execute
+    _executor.__geometry_watched__ = True
+
+
+def get_window_geometry(driver) -> dict:
+    """Return the window geometry of the session. The window size is requested only once until invalidated.
+
+    :param WebDriver driver: WebDriver obj.
+    :return: Geometry dictionary which has width, height, orientation, center, quarter and safe_region.
+    :rtype: dict.
+    """
+    with _LOCK:
+        _entry = _GEOMETRY_CACHE.get(driver.session_id)
+        if _entry is not None and _entry['geometry'] is not None:
+            return _entry['geometry']
+
+    _watch_commands(driver)
+    _window_size = driver.get_window_size()
+    _geometry = _build_geometry(_window_size['width'], _window_size['height'])
+
+    with _LOCK:
+        _GEOMETRY_CACHE.setdefault(driver.session_id, {"geometry": None, "activity": None})['geometry'] = _geometry
+    LOGGER.debug("Cache the window geometry (%sx%s) of %s.", _geometry['width'], _geometry['height'], driver.session_id)
+    return _geometry
+
+
+def invalidate_geometry(driver) -> None:
+    """Invalidate the cached window geometry of the session.
+
+    :param WebDriver driver: WebDriver obj.
+    """
+    with _LOCK:
+        _entry = _GEOMETRY_CACHE.get(driver.session_id)
+        if _entry is not None:
+            _entry['geometry'] = None
+
+
+def observe_orientation(driver, orientation) -> None:
+    """Notify the current orientation. The cache is invalidated if it is different from the cached geometry.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str orientation: Current orientation (PORTRAIT, LANDSCAPE)
+    """
+    with _LOCK:
+        _entry = _GEOMETRY_CACHE.get(driver.session_id)
+        if _entry is None or _entry['geometry'] is None:
+            return
+        if _entry['geometry']['orientation'] != orientation.upper():
+            _entry['geometry'] = None
+            LOGGER.debug("Orientation is changed to %s. Invalidate the window geometry.", orientation.upper())
+
+
+def observe_activity(driver, activity) -> None:
+    """Notify the current activity. The cache is invalidated if the activity is switched.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str activity: Current activity name.
+    """
+    with _LOCK:
+        _entry = _GEOMETRY_CACHE.setdefault(driver.session_id, {"geometry": None, "activity": None})
+        if _entry['activity'] is not None and _entry['activity'] != activity:
+            _entry['geometry'] = None
+            LOGGER.debug("Activity is switched to %s. Invalidate the window geometry.", activity)
+        _entry['activity'] = activity
+
+
+def clear_geometry(driver) -> None:
+    """Remove the cache entry of the session. (e.g. After quit the session)
+
+    :param WebDriver driver: WebDriver obj.
+    """
+    with _LOCK:
+        _GEOMETRY_CACHE.pop(driver.session_id, None)
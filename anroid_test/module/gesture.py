@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Gesture compiler.
+Compile the touch strokes into one W3C Actions request. (Instead of the deprecated TouchAction)
+"""
+
+from selenium.webdriver.common.actions import interaction
+from selenium.webdriver.common.actions.action_builder import ActionBuilder
+from selenium.webdriver.common.actions.mouse_button import MouseButton
+from selenium.webdriver.common.actions.pointer_input import PointerInput
+
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+
+def compile_strokes(driver, strokes, hold=100, duration=200, interval=300) -> ActionBuilder:
+    """Compile the strokes into one W3C Actions sequence.
+
+    :param WebDriver driver: WebDriver obj.
+    :param list strokes: Stroke list [({"x": x, "y": y}, {"x": x, "y": y}), ...] which is (start, end) position.
+    :param int hold: Holding time after press, in milliseconds. (default=100)
+    :param int duration: Moving time from start to end position, in milliseconds. (default=200)
+    :param int interval: Pause time between the strokes, in milliseconds. (default=300)
+    :return: ActionBuilder which has the whole sequence.
+    :rtype: ActionBuilder.
+    """
+    _finger = PointerInput(interaction.POINTER_TOUCH, "finger")
+    _builder = ActionBuilder(driver, mouse=_finger)
+
+    for _index, (_start, _end) in enumerate(strokes):
+        if _index > 0:
+            _finger.create_pause(interval / 1000)
+        _finger.create_pointer_move(duration=0, x=int(_start['x']), y=int(_start['y']), origin="viewport")
+        _finger.create_pointer_down(button=MouseButton.LEFT)
+        _finger.create_pause(hold / 1000)
+        _finger.create_pointer_move(duration=duration, x=int(_end['x']), y=int(_end['y']), origin="viewport")
+        _finger.create_pointer_up(MouseButton.LEFT)
+
+    return _builder
+
+
+def perform_strokes(driver, strokes, hold=100, duration=200, interval=300) -> None:
+    """Perform the strokes by one W3C Actions request.
+
+    :param WebDriver driver: WebDriver obj.
+    :param list strokes: Stroke list [({"x": x, "y": y}, {"x": x, "y": y}), ...] which is (start, end) position.
+    :param int hold: Holding time after press, in milliseconds. (default=100)
+    :param int duration: Moving time from start to end position, in milliseconds. (default=200)
+    :param int interval: Pause time between the strokes, in milliseconds. (default=300)
+    """
+    if len(strokes) == 0:
+        return
+
+    compile_strokes(driver, strokes, hold, duration, interval).perform()
+    LOGGER.debug("Perform %s strokes is finish.", len(strokes))
+
+
+def perform_repeated_stroke(driver, start, end, times=1, hold=100, duration=200, interval=300) -> None:
+    """Perform the same stroke repeatedly by one W3C Actions request.
+
+    :param WebDriver driver: WebDriver obj.
+    :param dict start: Start position dictionary {"x": x, "y": y}.
+    :param dict end: End position dictionary {"x": x, "y": y}.
+    :param int times: Stroke repeat times. (default=1)
+    :param int hold: Holding time after press, in milliseconds. (default=100)
+    :param int duration: Moving time from start to end position, in milliseconds. (default=200)
+    :param int interval: Pause time between the strokes, in milliseconds. (default=300)
+    """
+    perform_strokes(driver, [(start, end)] * times, hold, duration, interval)
+
+
+def scroll_stroke(geometry, direction="up", x_position=None) -> tuple:
+    """Return the stroke of one scroll.
+
+    :param dict geometry: Window geometry from get_window_geometry().
+    :param str direction: Scroll direction string. (up, down)
+    :param int x_position: Standard X position. (default=center)
+    :return: Stroke ({"x": x, "y": y}, {"x": x, "y": y}) which is (start, end) position.
+    :rtype: tuple.
+    """
+    if x_position is None:
+        x_position = int(geometry['width'] / 2)
+
+    _start = {"x": x_position, "y": int(geometry['height'] / 2)}
+    if direction.lower() == "up":
+        _end = {"x": x_position, "y": int(geometry['height'] / 4)}
+    else:
+        _end = {"x": x_position, "y": int(geometry['height'] / 4 * 3)}
+    return _start, _end
+
+
+def swipe_stroke(geometry, direction="right", y_position=None) -> tuple:
+    """Return the stroke of one swipe.
+
+    :param dict geometry: Window geometry from get_window_geometry().
+    :param str direction: Swipe direction string. (right, left)
+    :param int y_position: Standard Y position. (default=center)
+    :return: Stroke ({"x": x, "y": y}, {"x": x, "y": y}) which is (start, end) position.
+    :rtype: tuple.
+    """
+    if y_position is None:
+        y_position = int(geometry['height'] / 2)
+
+    _start = {"x": int(geometry['width'] / 2), "y": y_position}
+    if direction.lower() == "left":
+        _end = {"x": int(geometry['width'] / 4), "y": y_position}
+    else:
+        _end = {"x": int(geometry['width'] / 4 * 3), "y": y_position}
+    return _start, _end
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Multi-touch path generator.
+Generate the finger trajectories of pinch and rotate gestures at once, and memoize them by the window size.
+"""
+import functools
+
+import numpy as np
+
+
+def _to_paths(xs, ys) -> tuple:
+    """Convert the coordinate arrays to the immutable paths.
+
+    :param numpy.ndarray xs: X coordinate array which shape is (finger, point).
+    :param numpy.ndarray ys: Y coordinate array which shape is (finger, point).
+    :return: Paths (((x, y), ...), ...) by finger.
+    :rtype: tuple.
+    """
+    _points = np.stack((xs.astype(int), ys.astype(int)), axis=-1).tolist()
+    return tuple(tuple(tuple(_point) for _point in _path) for _path in _points)
+
+
+@functools.lru_cache(maxsize=128)
+def pinch_paths(width, height, direction="in", finger_count=2, points=2) -> tuple:
+    """Return the finger paths of the pinch gesture.
+
+    :param int width: Window width.
+    :param int height: Window height.
+    :param str direction: Pinch direction (in, out). (default=in)
+    :param int finger_count: The number of fingers which are spread evenly from 45 degrees. (default=2)
+    :param int points: The number of points of each path including start and end. (default=2)
+    :return: Paths (((x, y), ...), ...) by finger.
+    :rtype: tuple.
+    """
+    if direction not in ["in", "out"]:
+        raise ValueError("Please check the 'direction' value. The 'direction' must be in ['in', 'out']")
+    if finger_count < 2 or points < 2:
+        raise ValueError("Please check the 'finger_count' and 'points' value. Both must be 2 or more.")
+
+    standard_x = int(width / 2)
+    standard_y = int(height / 2)
+
+    _diagonal = np.hypot(standard_x, standard_y)
+    _max_distance = int(_diagonal / 2)
+    _min_distance = int(_diagonal / 5)
+
+    if direction == "in":
+        _distances = np.linspace(_max_distance, _min_distance, points)
+    else:
+        _distances = np.linspace(_min_distance, _max_distance, points)
+
+    _radians = np.radians(45 + 360 / finger_count * np.arange(finger_count))[:, np.newaxis]
+    _xs = standard_x + _distances * np.cos(_radians)
+    _ys = standard_y + _distances * np.sin(_radians)
+    return _to_paths(_xs, _ys)
+
+
+@functools.lru_cache(maxsize=128)
+def rotate_paths(width, height, degree, direction="clockwise", finger_count=2, step=5) -> tuple:
+    """Return the finger paths of the rotate gesture. The first finger holds the center as a pivot.
+
+    :param int width: Window width.
+    :param int height: Window height.
+    :param int degree: Rotation degree value.
+    :param str direction: Rotation direction (clockwise, counterclockwise). (default=clockwise)
+    :param int finger_count: The number of fingers including the pivot finger. (default=2)
+    :param int step: Degree between the points of each path. (default=5)
+    :return: Paths (((x, y), ...), ...) by finger.
+    :rtype: tuple.
+    """
+    if direction not in ["clockwise", "counterclockwise"]:
+        raise ValueError("Please check the 'direction' value. "
+                         "The 'direction' must be in ['clockwise', 'counterclockwise']")
+    if finger_count < 2 or step <= 0:
+        raise ValueError("Please check the 'finger_count' and 'step' value. "
+                         "The 'finger_count' must be 2 or more and the 'step' must be positive.")
+
+    standard_x = int(width / 2)
+    standard_y = int(height / 2)
+
+    _distance = min(standard_x / 4 * 3, standard_y / 4 * 3)
+
+    _offsets = step * np.arange(int(degree / step) + 1)
+    _starts = (45 + 360 / (finger_count - 1) * np.arange(finger_count - 1))[:, np.newaxis]
+    if direction == "clockwise":
+        _radians = np.radians(_starts + _offsets)
+        _xs = standard_x + _distance * np.cos(_radians)
+        _ys = standard_y + _distance * np.sin(_radians)
+    else:
+        # Mirrored through the center as the original arithmetic, so the truncated points are the same.
+        _radians = np.radians(_starts + 180 - _offsets)
+        _xs = standard_x - _distance * np.cos(_radians)
+        _ys = standard_y - _distance * np.sin(_radians)
+    return ((standard_x, standard_y),), *_to_paths(_xs, _ys)
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""Per-command latency instrumentation.
+Record the wall time, the number of HTTP round trips and the payload sizes of the action module functions
+and WebDriver commands per device, and export them as JSON or Prometheus text.
+
+Call enable() before the action functions are imported by name (e.g. from ... import *),
+and instrument_driver() after the session is created.
+"""
+import bisect
+import contextvars
+import functools
+import importlib
+import inspect
+import json
+import re
+import threading
+import time
+
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_MODULE_NAMES = ("action_touch", "action_keycode", "action_additional", "network", "screencapture")
+
+_SESSION_PATTERN = re.compile(r"/session/([^/]+)")
+_ELEMENT_PATTERN = re.compile(r"/element/[^/]+")
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+_device_names = {}
+# Frames of the running instrumented functions. The thread which runs the command for the caller copies the context.
+_frames = contextvars.ContextVar("instrumentation_frames", default=())
+
+
+class Histogram:
+    """Latency histogram which has the fixed buckets."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """Initialize the Histogram.
+
+        :param tuple buckets: Upper bounds of the buckets, in seconds.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Add the value.
+
+        :param float value: Observed value, in seconds.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> dict:
+        """Return the histogram as the dictionary.
+
+        :return: Histogram dictionary {"buckets": {le: cumulative count}, "sum", "count"}.
+        :rtype: dict.
+        """
+        _cumulative = 0
+        _buckets = {}
+        for _bound, _count in zip((*self.buckets, "+Inf"), self.counts):
+            _cumulative += _count
+            _buckets[str(_bound)] = _cumulative
+        return {"buckets": _buckets, "sum": self.sum, "count": self.count}
+
+
+def _get_metric(kind, device, name) -> dict:
+    """Return the metric entry. It must be called with _metrics_lock.
+
+    :param str kind: Metric kind (function, command)
+    :param str device: Device name.
+    :param str name: Function or command name.
+    :return: Metric entry.
+    :rtype: dict.
+    """
+    _key = (kind, device, name)
+    if _key not in _metrics:
+        _metrics[_key] = {"latency": Histogram(), "round_trips": 0, "request_bytes": 0, "response_bytes": 0}
+    return _metrics[_key]
+
+
+def _device_of_driver(driver) -> str:
+    """Return the device name of the driver.
+
+    :param WebDriver driver: WebDriver obj.
+    :return: Device name.
+    :rtype: str.
+    """
+    _session_id = getattr(driver, 'session_id', None)
+    return _device_names.get(_session_id, _session_id or "unknown")
+
+
+def _payload_size(value) -> int:
+    """Return the approximate payload size.
+
+    :param value: Request body or response value.
+    :return: Size in bytes (characters for str).
+    :rtype: int.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(json.dumps(value, default=str))
+
+
+def instrument_function(func, module_name):
+    """Wrap the function to record the wall time, round trips and payload sizes.
+
+    :param callable func: Action function which takes the WebDriver obj as the first argument.
+    :param str module_name: Short module name for the metric name.
+    :return: Wrapped function.
+    :rtype: callable.
+    """
+    if getattr(func, '__instrumented__', False):
+        return func
+
+    _name = f"{module_name}.{func.__name__}"
+
+    @functools.wraps(func)
+    def _wrapper(driver, *args, **kwargs):
+        _frame = {"round_trips": 0, "request_bytes": 0, "response_bytes": 0}
+        _token = _frames.set((*_frames.get(), _frame))
+        _start_time = time.perf_counter()
+        try:
+            return func(driver, *args, **kwargs)
+        finally:
+            _elapsed = time.perf_counter() - _start_time
+            _frames.reset(_token)
+            with _metrics_lock:
+                _metric = _get_metric("function", _device_of_driver(driver), _name)
+                _metric['latency'].observe(_elapsed)
+                for _field, _value in _frame.items():
+                    _metric[_field] += _value
+
+    _wrapper.__instrumented__ = True
+    return _wrapper
+
+
+def instrument_module(module):
+    """Replace the public functions of the module with the instrumented functions.
+
+    :param module module: Action module.
+    """
+    _module_name = module.__name__.rsplit(".", 1)[-1]
+    for _name, _func in inspect.getmembers(module, inspect.isfunction):
+        if _func.__module__ == module.__name__ and not _name.startswith('_'):
+            setattr(module, _name, instrument_function(_func, _module_name))
+
+
+def instrument_driver(driver, device_name=None):
+    """Wrap the command executor of the driver to record every HTTP round trip.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str device_name: Device name for the metrics. (default=deviceName capability)
+    """
+    if device_name is None:
+        device_name = (driver.capabilities or {}).get('deviceName', driver.session_id)
+    _device_names[driver.session_id] = device_name
+
+    _executor = driver.command_executor
+    if getattr(_executor, '__instrumented__', False):
+        return
+
+    _request = _executor._request
+
+    def _instrumented_request(method, url, body=None):
+        _start_time = time.perf_counter()
+        _response = _request(method, url, body)
+        _elapsed = time.perf_counter() - _start_time
+
+        _request_bytes = _payload_size(body)
+        _response_bytes = _payload_size(_response.get('value') if isinstance(_response, dict) else _response)
+        for _frame in _frames.get():
+            _frame['round_trips'] += 1
+            _frame['request_bytes'] += _request_bytes
+            _frame['response_bytes'] += _response_bytes
+
+        _match = _SESSION_PATTERN.search(url)
+        _device = _device_names.get(_match.group(1), _match.group(1)) if _match else "server"
+        _path = _ELEMENT_PATTERN.sub("/element/:id", _SESSION_PATTERN.sub("/session/:id", url.split("://", 1)[-1]))
+        _command = f"{method} /{_path.split('/', 1)[-1]}"
+        with _metrics_lock:
+            _metric = _get_metric("command", _device, _command)
+            _metric['latency'].observe(_elapsed)
+            _metric['round_trips'] += 1
+            _metric['request_bytes'] += _request_bytes
+            _metric['response_bytes'] += _response_bytes
+        return _response
+
+    _executor._request = _instrumented_request
+    _executor.__instrumented__ = True
+
+
+def enable(module_names=DEFAULT_MODULE_NAMES):
+    """Instrument the action modules.
+
+    :param tuple module_names: Module names in anroid_test.module. (default=all action modules)
+    """
+    for _module_name in module_names:
+        instrument_module(importlib.import_module(f"anroid_test.module.{_module_name}"))
+    LOGGER.debug("Instrument the modules %s.", list(module_names))
+
+
+def reset():
+    """Remove all recorded metrics."""
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def export_json() -> dict:
+    """Export the metrics as the JSON serializable dictionary.
+
+    :return: Metrics dictionary {"function": {device: {name: metric}}, "command": {device: {name: metric}}}.
+    :rtype: dict.
+    """
+    _result = {"function": {}, "command": {}}
+    with _metrics_lock:
+        for (_kind, _device, _name), _metric in sorted(_metrics.items()):
+            _result[_kind].setdefault(_device, {})[_name] = dict(_metric, latency=_metric['latency'].to_dict())
+    return _result
+
+
+def write_json(path):
+    """Write the metrics into the JSON file.
+
+    :param str path: JSON file path.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(export_json(), f, ensure_ascii=False, indent=2)
+
+
+def _escape_label(value) -> str:
+    """Escape the Prometheus label value.
+
+    :param str value: Label value.
+    :return: Escaped label value.
+    :rtype: str.
+    """
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def export_prometheus(prefix="anroid_test") -> str:
+    """Export the metrics as the Prometheus text format.
+
+    :param str prefix: Metric name prefix. (default=anroid_test)
+    :return: Prometheus text.
+    :rtype: str.
+    """
+    _lines = []
+    _exported = export_json()
+    for _kind, _label in (("function", "function"), ("command", "command")):
+        _name = f"{prefix}_{_kind}_duration_seconds"
+        _lines.append(f"# HELP {_name} Wall time of the {_kind} calls.")
+        _lines.append(f"# TYPE {_name} histogram")
+        for _device, _entries in _exported[_kind].items():
+            for _entry_name, _metric in _entries.items():
+                _labels = f'device="{_escape_label(_device)}",{_label}="{_escape_label(_entry_name)}"'
+                for _bound, _count in _metric['latency']['buckets'].items():
+                    _lines.append(f'{_name}_bucket{{{_labels},le="{_bound}"}} {_count}')
+                _lines.append(f"{_name}_sum{{{_labels}}} {_metric['latency']['sum']}")
+                _lines.append(f"{_name}_count{{{_labels}}} {_metric['latency']['count']}")
+
+        for _field in ("round_trips", "request_bytes", "response_bytes"):
+            _counter = f"{prefix}_{_kind}_{_field}_total"
+            _lines.append(f"# TYPE {_counter} counter")
+            for _device, _entries in _exported[_kind].items():
+                for _entry_name, _metric in _entries.items():
+                    _labels = f'device="{_escape_label(_device)}",{_label}="{_escape_label(_entry_name)}"'
+                    _lines.append(f"{_counter}{{{_labels}}} {_metric[_field]}")
+    return "\n".join(_lines) + "\n"
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Locator optimizer.
+Rewrite the simple xpath expressions into the native selectors of UiAutomator2, which do not serialize the whole
+hierarchy. The xpath expression which can not be rewritten is used as it is.
+
+    //*[@content-desc="지도"]                        -> accessibility id: 지도
+    //*[@resource-id="android:id/title"]            -> id: android:id/title
+    //*[@text="연결"][@resource-id="android:id/title"] -> -android uiautomator: new UiSelector().text("연결")...
+"""
+import functools
+import re
+
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Locator strategies. (Same values as AppiumBy, which imports the whole appium.webdriver package)
+XPATH = "xpath"
+ID = "id"
+ACCESSIBILITY_ID = "accessibility id"
+ANDROID_UIAUTOMATOR = "-android uiautomator"
+
+_XPATH_PATTERN = re.compile(r"//(?P<tag>\*|[A-Za-z_][\w.$]*)(?P<predicates>(?:\[[^\[\]]+\])+)")
+_PREDICATE_PATTERN = re.compile(r"\[([^\[\]]+)\]")
+_CONDITION_PATTERN = re.compile(
+    r"\s*(?:@(?P<attribute>[\w-]+)\s*=\s*(?P<quote>[\"'])(?P<value>.*?)(?P=quote)"
+    r"|contains\(\s*@(?P<contains_attribute>[\w-]+)\s*,\s*(?P<contains_quote>[\"'])(?P<contains_value>.*?)"
+    r"(?P=contains_quote)\s*\))\s*")
+_AND_PATTERN = re.compile(r"and(?=\s)")
+
+# UiSelector methods by attribute.
+_EQUAL_METHODS = {
+    "text": "text", "content-desc": "description", "resource-id": "resourceId", "class": "className",
+    "package": "packageName",
+}
+_BOOLEAN_METHODS = {
+    "checkable": "checkable", "checked": "checked", "clickable": "clickable", "enabled": "enabled",
+    "focusable": "focusable", "focused": "focused", "long-clickable": "longClickable", "scrollable": "scrollable",
+    "selected": "selected",
+}
+_CONTAINS_METHODS = {"text": "textContains", "content-desc": "descriptionContains"}
+_MATCHES_METHODS = {"resource-id": "resourceIdMatches", "class": "classNameMatches", "package": "packageNameMatches"}
+
+
+def _java_string(value) -> str:
+    """Return the Java string literal of the value.
+
+    :param str value: String value.
+    :return: Quoted string.
+    :rtype: str.
+    """
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _parse_conditions(xpath):
+    """Parse the xpath expression into the conditions.
+
+    :param str xpath: Target element's xpath expression.
+    :return: Tag and condition list [(operator, attribute, value), ...], or None if it can not be parsed.
+    :rtype: tuple.
+    """
+    _match = _XPATH_PATTERN.fullmatch(xpath.strip())
+    if _match is None:
+        return None
+
+    _conditions = []
+    for _predicate in _PREDICATE_PATTERN.findall(_match.group('predicates')):
+        _position = 0
+        while True:
+            _condition = _CONDITION_PATTERN.match(_predicate, _position)
+            if _condition is None:
+                return None
+            if _condition.group('attribute') is not None:
+                _conditions.append(("=", _condition.group('attribute'), _condition.group('value')))
+            else:
+                _conditions.append(("contains", _condition.group('contains_attribute'),
+                                    _condition.group('contains_value')))
+
+            _position = _condition.end()
+            if _position == len(_predicate):
+                break
+            _and = _AND_PATTERN.match(_predicate, _position)
+            if _and is None:
+                return None
+            _position = _and.end()
+    return _match.group('tag'), _conditions
+
+
+def _to_ui_selector(tag, conditions):
+    """Return the UiSelector expression of the conditions.
+
+    :param str tag: Element class or '*'.
+    :param list conditions: Condition list [(operator, attribute, value), ...].
+    :return: UiSelector expression, or None if any condition can not be rewritten.
+    :rtype: str.
+    """
+    _selector = "new UiSelector()"
+    if tag != "*":
+        _selector += f".className({_java_string(tag)})"
+
+    for _operator, _attribute, _value in conditions:
+        if _operator == "=" and _attribute in _EQUAL_METHODS:
+            _selector += f".{_EQUAL_METHODS[_attribute]}({_java_string(_value)})"
+        elif _operator == "=" and _attribute in _BOOLEAN_METHODS and _value in ["true", "false"]:
+            _selector += f".{_BOOLEAN_METHODS[_attribute]}({_value})"
+        elif _operator == "contains" and _attribute in _CONTAINS_METHODS:
+            _selector += f".{_CONTAINS_METHODS[_attribute]}({_java_string(_value)})"
+        elif _operator == "contains" and _attribute in _MATCHES_METHODS:
+            # \Q...\E quotes the value in the Java regular expression.
+            _pattern = ".*\\Q" + _value + "\\E.*"
+            _selector += f".{_MATCHES_METHODS[_attribute]}({_java_string(_pattern)})"
+        else:
+            return None
+    return _selector
+
+
+@functools.lru_cache(maxsize=1024)
+def optimize_locator(xpath) -> tuple:
+    """Rewrite the xpath expression into the native selector.
+
+    :param str xpath: Target element's xpath expression.
+    :return: Locator (strategy, value). The strategy is XPATH if it can not be rewritten.
+    :rtype: tuple.
+    """
+    _parsed = _parse_conditions(xpath)
+    if _parsed is None:
+        return XPATH, xpath
+
+    _tag, _conditions = _parsed
+    if _tag == "*" and len(_conditions) == 1 and _conditions[0][0] == "=":
+        _, _attribute, _value = _conditions[0]
+        if _attribute == "content-desc":
+            return ACCESSIBILITY_ID, _value
+        # The resource id without the package is completed with the package of the app by UiAutomator2.
+        if _attribute == "resource-id" and ":id/" in _value:
+            return ID, _value
+
+    _selector = _to_ui_selector(_tag, _conditions)
+    if _selector is None:
+        return XPATH, xpath
+
+    LOGGER.debug("Rewrite the '%s' into '%s'.", xpath, _selector)
+    return ANDROID_UIAUTOMATOR, _selector
+
+
+def find_element(driver, xpath):
+    """Find the element with the native selector of the xpath expression.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str xpath: Target element's xpath expression.
+    :return: Found element.
+    :rtype: WebElement.
+    """
+    _by, _value = optimize_locator(xpath)
+    return driver.find_element(by=_by, value=_value)
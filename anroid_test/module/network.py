@@ -2,11 +2,9 @@
 """Related on the Network function.
 ()
 """
-import logging
+from anroid_test.module.async_logging import get_logger
 
-from miraelogger import Logger
-
-LOGGER = Logger(log_name=__name__, stream_log_level=logging.DEBUG)
+LOGGER = get_logger(__name__)
 
 
 # Network (appium/webdriver/extensions/android/network.py)
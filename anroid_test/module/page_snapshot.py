@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Page source snapshot.
+Pull the page source once and resolve the xpath expressions in local.
+"""
+import re
+
+from lxml import etree
+
+import selenium.common.exceptions
+
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+# UiAutomator2 bounds format: "[left,top][right,bottom]"
+_BOUNDS_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+def take_snapshot(driver):
+    """Take the snapshot of current screen's page source.
+
+    :param WebDriver driver: WebDriver obj.
+    :return: Parsed page source.
+    :rtype: lxml.etree._Element.
+    """
+    _page_source = driver.page_source
+    return etree.fromstring(_page_source.encode('utf-8'))
+
+
+def _find_node(snapshot, xpath):
+    """Return the first element which has the bounds in snapshot.
+
+    :param lxml.etree._Element snapshot: Snapshot from take_snapshot().
+    :param str xpath: Target element's xpath expression.
+    :return: Element and bounds match.
+    :rtype: tuple.
+    """
+    try:
+        _elements = snapshot.xpath(xpath)
+    except etree.XPathError:
+        LOGGER.exception(msg := f"Please check the '{xpath}' is valid xpath expression.")
+        raise ValueError(msg)
+
+    for _element in _elements:
+        if not isinstance(_element, etree._Element):
+            continue
+        _match = _BOUNDS_PATTERN.fullmatch(_element.get('bounds', ''))
+        if _match is not None:
+            return _element, _match
+
+    LOGGER.exception(msg := f"Could not find the '{xpath}' in snapshot.")
+    raise selenium.common.exceptions.NoSuchElementException(msg)
+
+
+def get_bounds(snapshot, xpath) -> dict:
+    """Return the bounds of the element in snapshot.
+
+    :param lxml.etree._Element snapshot: Snapshot from take_snapshot().
+    :param str xpath: Target element's xpath expression.
+    :return: Bounds dictionary {"left": left, "top": top, "right": right, "bottom": bottom}.
+    :rtype: dict.
+    """
+    _, _match = _find_node(snapshot, xpath)
+    _left, _top, _right, _bottom = (int(_value) for _value in _match.groups())
+    return {"left": _left, "top": _top, "right": _right, "bottom": _bottom}
+
+
+def get_text(snapshot, xpath) -> str:
+    """Return the text of the element in snapshot.
+
+    :param lxml.etree._Element snapshot: Snapshot from take_snapshot().
+    :param str xpath: Target element's xpath expression.
+    :return: Text of the element.
+    :rtype: str.
+    """
+    _element, _ = _find_node(snapshot, xpath)
+    return _element.get('text', '')
+
+
+def get_center_position(snapshot, xpath) -> dict:
+    """Return the center position of the element in snapshot.
+
+    :param lxml.etree._Element snapshot: Snapshot from take_snapshot().
+    :param str xpath: Target element's xpath expression.
+    :return: Position dictionary {"x": x, "y": y}.
+    :rtype: dict.
+    """
+    _bounds = get_bounds(snapshot, xpath)
+    return {"x": int((_bounds['left'] + _bounds['right']) / 2), "y": int((_bounds['top'] + _bounds['bottom']) / 2)}
+
+
+def resolve_positions(driver, xpaths, snapshot=None) -> dict:
+    """Resolve the center positions of several elements using one page source.
+
+    :param WebDriver driver: WebDriver obj.
+    :param list xpaths: Target elements' xpath expressions.
+    :param lxml.etree._Element snapshot: Snapshot to reuse. If it is None, take the new snapshot. (default=None)
+    :return: Position dictionary by xpath {xpath: {"x": x, "y": y}}.
+    :rtype: dict.
+    """
+    if snapshot is None:
+        snapshot = take_snapshot(driver)
+
+    return {_xpath: get_center_position(snapshot, _xpath) for _xpath in xpaths}
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""Record and replay.
+Record the WebDriver commands which the action functions send (resolved positions, keycodes, text) into the JSON lines
+file, and replay them at the device speed. The replayer waits the UI idle only after the recorded screen transitions.
+The activity is compared only before the element is found after the actions, and the transition is marked on the last
+action.
+
+    with Recorder(_driver, "basic_touch.jsonl"):
+        run_basic_touch(_driver)
+
+    replay(_driver, "basic_touch.jsonl")
+"""
+import json
+
+from appium.webdriver.mobilecommand import MobileCommand
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webelement import WebElement
+
+from anroid_test.module.async_logging import get_logger
+from anroid_test.module.wait import DEFAULT_SETTLE_TIMEOUT, wait_for_idle
+
+LOGGER = get_logger(__name__)
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+# Parameter keys which have the element id. ("element" is used by the TouchAction options)
+_ELEMENT_ID_KEYS = (ELEMENT_KEY, "id", "elementId", "element")
+
+# Commands which do not change the device. (They are not recorded)
+_QUERY_COMMANDS = {
+    Command.GET_PAGE_SOURCE, Command.SCREENSHOT, Command.ELEMENT_SCREENSHOT, Command.GET_WINDOW_RECT,
+    Command.GET_TIMEOUTS, Command.GET_SCREEN_ORIENTATION, Command.GET_ELEMENT_TEXT, Command.GET_ELEMENT_ATTRIBUTE,
+    Command.GET_ELEMENT_PROPERTY, Command.GET_ELEMENT_RECT, Command.GET_ELEMENT_TAG_NAME,
+    Command.IS_ELEMENT_SELECTED, Command.IS_ELEMENT_ENABLED, Command.W3C_GET_ACTIVE_ELEMENT,
+    MobileCommand.GET_CURRENT_ACTIVITY, MobileCommand.GET_CURRENT_PACKAGE, MobileCommand.IS_KEYBOARD_SHOWN,
+    MobileCommand.IS_LOCKED, MobileCommand.GET_NETWORK_CONNECTION,
+}
+# Extension scripts which do not change the device. (They are not recorded)
+_QUERY_SCRIPTS = {
+    "mobile: getCurrentActivity", "mobile: getCurrentPackage", "mobile: isKeyboardShown", "mobile: getConnectivity",
+    "mobile: getDeviceTime", "mobile: getPerformanceData", "mobile: listApps",
+}
+# Commands which are not replayed.
+_SKIPPED_COMMANDS = _QUERY_COMMANDS | {
+    Command.NEW_SESSION, Command.QUIT, MobileCommand.START_RECORDING_SCREEN, MobileCommand.STOP_RECORDING_SCREEN,
+}
+# Commands which find the elements. The element ids of the response are recorded.
+_FIND_COMMANDS = {Command.FIND_ELEMENT, Command.FIND_ELEMENTS, Command.FIND_CHILD_ELEMENT, Command.FIND_CHILD_ELEMENTS}
+# Commands which do not move the screen. (The activity is not checked after them)
+_STILL_COMMANDS = _FIND_COMMANDS | {Command.SET_TIMEOUTS}
+
+
+def _is_query(driver_command, params) -> bool:
+    """Return True if the command does not change the device.
+
+    :param str driver_command: Command name.
+    :param dict params: Command parameters.
+    :return: The command is the query or not.
+    :rtype: bool.
+    """
+    if driver_command == Command.W3C_EXECUTE_SCRIPT:
+        return (params or {}).get('script') in _QUERY_SCRIPTS
+    return driver_command in _SKIPPED_COMMANDS
+
+
+def _element_ids(value) -> list:
+    """Return the element ids of the find command response.
+
+    :param value: Response value. (WebElement or list of WebElement)
+    :return: Element id list.
+    :rtype: list.
+    """
+    if isinstance(value, WebElement):
+        return [value.id]
+    if isinstance(value, list):
+        return [_element.id for _element in value if isinstance(_element, WebElement)]
+    return []
+
+
+def _remap_element_ids(value, element_ids):
+    """Replace the recorded element ids with the element ids of the current session.
+
+    :param value: Recorded command parameters.
+    :param dict element_ids: Element id dictionary {recorded id: current id}.
+    :return: Parameters which have the current element ids.
+    """
+    if isinstance(value, dict):
+        _remapped = {}
+        for _key, _value in value.items():
+            if _key in _ELEMENT_ID_KEYS and isinstance(_value, str):
+                _remapped[_key] = element_ids.get(_value, _value)
+            else:
+                _remapped[_key] = _remap_element_ids(_value, element_ids)
+        return _remapped
+    if isinstance(value, list):
+        return [_remap_element_ids(_value, element_ids) for _value in value]
+    return value
+
+
+class Recorder:
+    """Record the commands of the driver into the JSON lines file.
+    Each line is {"c": command, "p": parameters} with "e": found element ids for the find commands,
+    and "t": true for the command after which the screen moved to another activity.
+    """
+
+    def __init__(self, driver, path):
+        """Initialize the Recorder.
+
+        :param WebDriver driver: WebDriver obj.
+        :param str path: Recording file path. (e.g. basic_touch.jsonl)
+        """
+        self.driver = driver
+        self.path = path
+        self._file = None
+        self._execute = None
+        self._previous_execute = None
+        self._activity = None
+        self._last_record = None
+        self._acted = False
+
+    def start(self):
+        """Start recording. Wrap the execute method of the driver."""
+        if self._execute is not None:
+            return self
+
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._previous_execute = self.driver.__dict__.get('execute')
+        self._execute = self.driver.execute
+        self._activity = self.driver.current_activity
+        self.driver.execute = self._recording_execute
+        LOGGER.info("Start recording into %s", self.path)
+        return self
+
+    def stop(self):
+        """Stop recording. Restore the execute method of the driver."""
+        if self._execute is None:
+            return
+
+        self._check_transition()
+        self._flush_record()
+        if self._previous_execute is None:
+            del self.driver.execute
+        else:
+            self.driver.execute = self._previous_execute
+        self._execute = None
+        self._file.close()
+        self._file = None
+        LOGGER.info("Stop recording into %s", self.path)
+
+    def mark_transition(self):
+        """Mark the last command as the screen transition. (e.g. The fragment is changed in the same activity)"""
+        if self._last_record is not None:
+            self._last_record['t'] = True
+
+    def _check_transition(self):
+        """Compare the activity if any action is recorded after the last comparison."""
+        if not self._acted:
+            return
+
+        self._acted = False
+        _activity = self.driver.current_activity
+        if _activity != self._activity:
+            LOGGER.debug("Screen transition %s -> %s", self._activity, _activity)
+            self._activity = _activity
+            self.mark_transition()
+
+    def _flush_record(self):
+        """Write the last record into the file."""
+        if self._last_record is not None:
+            self._file.write(json.dumps(self._last_record, ensure_ascii=False, separators=(',', ':')) + "\n")
+            self._last_record = None
+
+    def _recording_execute(self, driver_command, params=None):
+        """Execute the command and record it.
+
+        :param str driver_command: Command name.
+        :param dict params: Command parameters.
+        :return: Command response.
+        :rtype: dict.
+        """
+        if driver_command in _FIND_COMMANDS:
+            # The replayer waits for the new screen before this lookup.
+            self._check_transition()
+
+        _params = self.driver._wrap_value(params) if params else {}
+        _response = self._execute(driver_command, params)
+        if _is_query(driver_command, params):
+            return _response
+
+        self._flush_record()
+        _params.pop("sessionId", None)
+        self._last_record = {"c": driver_command, "p": _params}
+        if driver_command in _FIND_COMMANDS:
+            self._last_record['e'] = _element_ids(_response.get('value'))
+        elif driver_command not in _STILL_COMMANDS:
+            self._acted = True
+        return _response
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def load_recording(path) -> list:
+    """Load the recording file.
+
+    :param str path: Recording file path.
+    :return: Record list [{"c": command, "p": parameters, ...}, ...].
+    :rtype: list.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(_line) for _line in f if _line.strip()]
+
+
+def replay(driver, path, settle=DEFAULT_SETTLE_TIMEOUT) -> int:
+    """Replay the recording without the think time.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str path: Recording file path.
+    :param float settle: The ceiling of waiting the UI idle after the screen transition, in seconds. (default=3.0)
+    :return: The number of replayed commands.
+    :rtype: int.
+    """
+    _id_map = {}
+    _records = load_recording(path)
+    for _record in _records:
+        _response = driver.execute(_record['c'], _remap_element_ids(_record['p'], _id_map))
+        if "e" in _record:
+            _id_map.update(zip(_record['e'], _element_ids((_response or {}).get('value'))))
+        if _record.get('t') and settle:
+            wait_for_idle(driver, settle)
+
+    LOGGER.info("Replay %s commands from %s", len(_records), path)
+    return len(_records)
+
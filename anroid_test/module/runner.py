@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""Multi-device scenario runner.
+Run the same scenario on several devices at the same time with the separated Appium service per device.
+"""
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import appium.webdriver.appium_service
+from appium import webdriver
+
+from anroid_test.module.async_logging import get_logger
+from anroid_test.module.geometry import clear_geometry
+
+LOGGER = get_logger(__name__)
+
+DEFAULT_APPIUM_PORT = 4723
+# UiAutomator2 recommends the systemPort range is from 8200 to 8299.
+DEFAULT_SYSTEM_PORT = 8200
+
+
+def _is_port_free(port) -> bool:
+    """Check the local port is free.
+
+    :param int port: Port number.
+    :return: True if the port can be bound.
+    :rtype: bool.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as _socket:
+        try:
+            _socket.bind(("127.0.0.1", port))
+        except OSError:
+            return False
+    return True
+
+
+def allocate_ports(count, base_port=DEFAULT_APPIUM_PORT, base_system_port=DEFAULT_SYSTEM_PORT) -> list:
+    """Allocate the Appium service port and UiAutomator2 systemPort per device.
+
+    :param int count: The number of devices.
+    :param int base_port: The first Appium service port to try. (default=4723)
+    :param int base_system_port: The first systemPort to try. (default=8200)
+    :return: Port list [(port, system_port), ...].
+    :rtype: list.
+    """
+    _ports = []
+    # Ports which are handed out already. (They are not bound until the services start)
+    _reserved = set()
+    _port = base_port
+    _system_port = base_system_port
+    for _ in range(count):
+        while _port in _reserved or not _is_port_free(_port):
+            _port += 1
+        _reserved.add(_port)
+        while _system_port in _reserved or not _is_port_free(_system_port):
+            _system_port += 1
+        _reserved.add(_system_port)
+        _ports.append((_port, _system_port))
+    return _ports
+
+
+def _start_service(port, args) -> appium.webdriver.appium_service.AppiumService:
+    """Start the Appium service on the port.
+
+    :param int port: Appium service port.
+    :param list args: Additional Appium arguments.
+    :return: Started AppiumService.
+    :rtype: AppiumService.
+    """
+    _service = appium.webdriver.appium_service.AppiumService()
+    _service.start(args=["--port", str(port), *args])
+    LOGGER.info("Appium service start on %s", port)
+    return _service
+
+
+def _run_device(scenario, capabilities, port, system_port) -> dict:
+    """Connect the device and run the scenario.
+
+    :param callable scenario: Scenario function which takes the WebDriver obj.
+    :param dict capabilities: Device capabilities.
+    :param int port: Appium service port.
+    :param int system_port: UiAutomator2 systemPort.
+    :return: Result dictionary {"result": return value, "error": exception, "elapsed": seconds}.
+    :rtype: dict.
+    """
+    _capabilities = dict(capabilities, systemPort=system_port)
+    _result = {"result": None, "error": None, "elapsed": 0.0}
+    _start_time = time.monotonic()
+    _driver = None
+    try:
+        _driver = webdriver.Remote(f"http://localhost:{port}", _capabilities)
+        LOGGER.info("%s is connected.", capabilities['deviceName'])
+        _result['result'] = scenario(_driver)
+    except Exception as e:
+        LOGGER.exception(f"Scenario on {capabilities['deviceName']} is failed.")
+        _result['error'] = e
+    finally:
+        if _driver is not None:
+            clear_geometry(_driver)
+            _driver.quit()
+            LOGGER.info("%s is disconnected.", capabilities['deviceName'])
+        _result['elapsed'] = time.monotonic() - _start_time
+    return _result
+
+
+def run_on_devices(scenario, capabilities_list, args=None, base_port=DEFAULT_APPIUM_PORT,
+                   base_system_port=DEFAULT_SYSTEM_PORT) -> dict:
+    """Run the scenario on the devices in parallel. Each device uses its own Appium service and systemPort.
+
+    :param callable scenario: Scenario function which takes the WebDriver obj.
+    :param list capabilities_list: Capabilities dictionary list of the devices.
+    :param list args: Additional Appium arguments. (default=None)
+    :param int base_port: The first Appium service port to try. (default=4723)
+    :param int base_system_port: The first systemPort to try. (default=8200)
+    :return: Result dictionary by device name {deviceName: {"result": ..., "error": ..., "elapsed": ...}}.
+    :rtype: dict.
+    """
+    args = [] if args is None else args
+    if not capabilities_list:
+        LOGGER.warning("No device to run the scenario.")
+        return {}
+    _ports = allocate_ports(len(capabilities_list), base_port, base_system_port)
+
+    with ThreadPoolExecutor(max_workers=len(capabilities_list)) as _executor:
+        _service_futures = [_executor.submit(_start_service, _port, args) for _port, _ in _ports]
+        _services = []
+        _errors = []
+        for _future in _service_futures:
+            try:
+                _services.append(_future.result())
+            except appium.webdriver.appium_service.AppiumServiceError as e:
+                _errors.append(e)
+
+        try:
+            if _errors:
+                LOGGER.error("Could not start %s Appium services.", len(_errors))
+                raise _errors[0]
+
+            _futures = {_capabilities['deviceName']: _executor.submit(_run_device, scenario, _capabilities,
+                                                                      _port, _system_port)
+                        for _capabilities, (_port, _system_port) in zip(capabilities_list, _ports)}
+            return {_name: _future.result() for _name, _future in _futures.items()}
+        finally:
+            for _service in _services:
+                _service.stop()
+            LOGGER.info("Appium services stop")
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""Declarative scenario.
+Load the scenario file (JSON or YAML) once, compile it into the execution plan and run the plan.
+
+    name: basic_touch
+    timeout: 1.0            # Implicit wait to find the elements.
+    steps:
+      - keycode: 3
+      - wait_idle: 1
+      - swipe: {direction: right, times: 3}
+      - touch: '//*[@content-desc="지도"]'
+        settle: 3
+      - screen:             # The xpath expressions are resolved from one page source.
+          - touch: '//*[@text="Battery"]'   # The page source is taken after this element is found.
+          - text: {xpath: '//*[@text="검색"]', value: "hello"}
+
+The planner merges the adjacent scroll/swipe steps into one W3C Actions request, groups the adjacent keycodes
+and texts, and calls implicitly_wait only when the waiting time of the element lookup is changed.
+The steps are not merged over the step which has 'settle'.
+The 'screen' block waits only for the first xpath expression, with the 'timeout' of the block, and takes the page
+source. The other elements must be already rendered, so the steps in the block can not have 'timeout'.
+"""
+import json
+import os
+
+from anroid_test.module import action_additional, action_keycode, action_touch
+from anroid_test.module.async_logging import get_logger
+from anroid_test.module.geometry import get_window_geometry
+from anroid_test.module.gesture import perform_strokes, scroll_stroke, swipe_stroke
+from anroid_test.module.locator import find_element
+from anroid_test.module.page_snapshot import take_snapshot
+from anroid_test.module.wait import settle_ui, wait_for_idle
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+LOGGER = get_logger(__name__)
+
+DEFAULT_TIMEOUT = 1.0
+
+# Steps which find the element by the xpath expression.
+_LOOKUP_ACTIONS = ("touch", "double_touch", "long_press")
+# Steps which are allowed in the 'screen' block.
+_SCREEN_ACTIONS = (*_LOOKUP_ACTIONS, "text")
+_ACTIONS = (*_SCREEN_ACTIONS, "keycode", "scroll", "swipe", "pinch_in", "pinch_out", "rotate", "back",
+            "implicitly_wait", "wait_idle", "screen")
+_STEP_OPTIONS = ("settle", "timeout")
+
+_FUNCTIONS = {
+    "touch": action_touch.touch,
+    "double_touch": action_touch.double_touch,
+    "long_press": action_touch.long_press,
+    "pinch_in": action_touch.pinch_in,
+    "pinch_out": action_touch.pinch_out,
+    "rotate": action_touch.rotate,
+    "back": action_additional.back,
+}
+
+
+def load_scenario(path) -> dict:
+    """Load the scenario file.
+
+    :param str path: Scenario file path (.json, .yaml, .yml)
+    :return: Scenario dictionary {"name", "timeout", "settle", "steps"}.
+    :rtype: dict.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if os.path.splitext(path)[1].lower() in [".yaml", ".yml"]:
+            if yaml is None:
+                LOGGER.exception(msg := "Please install PyYAML to load the YAML scenario.")
+                raise ImportError(msg)
+            _scenario = yaml.safe_load(f)
+        else:
+            _scenario = json.load(f)
+
+    if not isinstance(_scenario, dict) or not isinstance(_scenario.get('steps'), list):
+        LOGGER.exception(msg := f"Please check the scenario {path} has the 'steps' list.")
+        raise ValueError(msg)
+    return _scenario
+
+
+def _split_step(step) -> tuple:
+    """Split the step into the action name, the action value and the step options.
+
+    :param dict step: Step dictionary. (e.g. {"touch": "//*[@text='Battery']", "settle": 2})
+    :return: Action name, action value and options dictionary.
+    :rtype: tuple.
+    """
+    _actions = [_key for _key in step if _key not in _STEP_OPTIONS] if isinstance(step, dict) else []
+    if len(_actions) != 1 or _actions[0] not in _ACTIONS:
+        LOGGER.exception(msg := f"Please check the step {step}. The step must have one action in {list(_ACTIONS)}")
+        raise ValueError(msg)
+    return _actions[0], step[_actions[0]], {_key: step[_key] for _key in _STEP_OPTIONS if _key in step}
+
+
+def _stroke_of(action, value) -> tuple:
+    """Return the stroke definition of the scroll or swipe step.
+
+    :param str action: scroll or swipe.
+    :param value: Direction string or dictionary {"direction", "times", "x_position" or "y_position"}.
+    :return: Stroke definition (action, direction, position, times).
+    :rtype: tuple.
+    """
+    _value = {"direction": value} if isinstance(value, str) else dict(value or {})
+    _directions = ["up", "down"] if action == "scroll" else ["right", "left"]
+    _direction = _value.get('direction', _directions[0]).lower()
+    if _direction not in _directions:
+        LOGGER.exception(msg := f"Please check the 'direction' of {action}. The 'direction' must be in {_directions}")
+        raise ValueError(msg)
+    _position = _value.get('x_position' if action == "scroll" else 'y_position')
+    return action, _direction, _position, int(_value.get('times', 1))
+
+
+def _first_xpath(ops):
+    """Return the first xpath expression which the operations of the 'screen' block find.
+
+    :param list ops: Operations of the 'screen' block.
+    :return: XPath expression or None if the operations find only the positions.
+    :rtype: str.
+    """
+    for _op in ops:
+        if _op['op'] == "fill":
+            return next(iter(_op['fields']))
+        if isinstance(_op['args'][0], str):
+            return _op['args'][0]
+    return None
+
+
+class _Planner:
+    """Compile the steps into the plan."""
+
+    def __init__(self, timeout, settle):
+        """Initialize the _Planner.
+
+        :param float timeout: Implicit wait to find the elements.
+        :param settle: Default settle of the steps.
+        """
+        self.timeout = timeout
+        self.settle = settle
+        self.implicit_wait = None
+        self.plan = []
+
+    def _need_implicit_wait(self, timeout, plan):
+        """Add implicitly_wait into the plan only if the waiting time is changed.
+
+        :param float timeout: Waiting time of the lookup.
+        :param list plan: Plan to add.
+        """
+        if timeout != self.implicit_wait:
+            plan.append({"op": "implicitly_wait", "seconds": timeout})
+            self.implicit_wait = timeout
+
+    @staticmethod
+    def _mergeable(plan, op) -> bool:
+        """Check the last operation of the plan can take the next step.
+
+        :param list plan: Plan.
+        :param str op: Operation name of the next step.
+        :return: True if the last operation is the same operation which does not settle.
+        :rtype: bool.
+        """
+        return len(plan) > 0 and plan[-1]['op'] == op and not plan[-1]['settle']
+
+    def add(self, step, plan, in_screen=False):
+        """Compile the step and add it into the plan.
+
+        :param dict step: Step dictionary.
+        :param list plan: Plan to add.
+        :param bool in_screen: The step is in the 'screen' block.
+        """
+        _action, _value, _options = _split_step(step)
+        _settle = _options.get('settle', self.settle)
+        if in_screen and _action not in _SCREEN_ACTIONS:
+            LOGGER.exception(msg := f"Please check the step {step}. The 'screen' block allows only "
+                                    f"{list(_SCREEN_ACTIONS)}")
+            raise ValueError(msg)
+        if in_screen and 'timeout' in _options:
+            LOGGER.exception(msg := f"Please check the step {step}. The steps in the 'screen' block can not have "
+                                    f"'timeout'. Please set it to the 'screen' step.")
+            raise ValueError(msg)
+
+        if _action == "implicitly_wait":
+            # Only the waiting time is changed. It is called when the next lookup needs it.
+            self.timeout = float(_value)
+        elif _action == "wait_idle":
+            plan.append({"op": "wait_idle", "timeout": float(_value), "settle": None})
+        elif _action == "keycode":
+            _keycodes = [int(_value)] if isinstance(_value, (int, str)) else [int(_code) for _code in _value]
+            if self._mergeable(plan, "keycodes"):
+                plan[-1]['keycodes'].extend(_keycodes)
+                plan[-1]['settle'] = _settle
+            else:
+                plan.append({"op": "keycodes", "keycodes": _keycodes, "settle": _settle})
+        elif _action in ["scroll", "swipe"]:
+            _stroke = _stroke_of(_action, _value)
+            if self._mergeable(plan, "strokes"):
+                plan[-1]['strokes'].append(_stroke)
+                plan[-1]['settle'] = _settle
+            else:
+                plan.append({"op": "strokes", "strokes": [_stroke], "settle": _settle})
+        elif _action == "text":
+            if self._mergeable(plan, "fill") and _value['xpath'] not in plan[-1]['fields']:
+                plan[-1]['fields'][_value['xpath']] = str(_value['value'])
+                plan[-1]['settle'] = _settle
+            else:
+                if not in_screen:
+                    self._need_implicit_wait(float(_options.get('timeout', self.timeout)), plan)
+                plan.append({"op": "fill", "fields": {_value['xpath']: str(_value['value'])}, "settle": _settle})
+        elif _action == "screen":
+            _ops = []
+            for _step in _value:
+                self.add(_step, _ops, in_screen=True)
+            _wait_xpath = _first_xpath(_ops)
+            if _wait_xpath is not None:
+                self._need_implicit_wait(float(_options.get('timeout', self.timeout)), plan)
+            plan.append({"op": "screen", "ops": _ops, "wait_xpath": _wait_xpath, "settle": _settle})
+        elif _action in _LOOKUP_ACTIONS:
+            if isinstance(_value, str) and not in_screen:
+                self._need_implicit_wait(float(_options.get('timeout', self.timeout)), plan)
+            plan.append({"op": "call", "function": _action, "args": [_value], "kwargs": {"timeout": None},
+                         "settle": _settle})
+        else:
+            if isinstance(_value, dict):
+                _args, _kwargs = [], dict(_value)
+            else:
+                _args, _kwargs = ([] if _value is None else [_value]), {}
+            plan.append({"op": "call", "function": _action, "args": _args, "kwargs": _kwargs, "settle": _settle})
+
+
+def compile_scenario(scenario) -> list:
+    """Compile the scenario into the execution plan.
+
+    :param dict scenario: Scenario dictionary from load_scenario().
+    :return: Plan [{"op": operation name, ..., "settle": settle}, ...].
+    :rtype: list.
+    """
+    _planner = _Planner(float(scenario.get('timeout', DEFAULT_TIMEOUT)), scenario.get('settle'))
+    for _step in scenario['steps']:
+        _planner.add(_step, _planner.plan)
+
+    LOGGER.debug("Compile %s steps into %s operations.", len(scenario['steps']), len(_planner.plan))
+    return _planner.plan
+
+
+def _execute_op(driver, op, snapshot=None):
+    """Execute the operation of the plan.
+
+    :param WebDriver driver: WebDriver obj.
+    :param dict op: Operation.
+    :param lxml.etree._Element snapshot: Page source snapshot of the 'screen' block. (default=None)
+    """
+    if op['op'] == "implicitly_wait":
+        driver.implicitly_wait(op['seconds'])
+        return
+    if op['op'] == "wait_idle":
+        wait_for_idle(driver, op['timeout'])
+        return
+
+    if op['op'] == "keycodes":
+        action_keycode.press_keycodes(driver, op['keycodes'])
+    elif op['op'] == "strokes":
+        _geometry = get_window_geometry(driver)
+        _strokes = []
+        for _action, _direction, _position, _times in op['strokes']:
+            _stroke_function = scroll_stroke if _action == "scroll" else swipe_stroke
+            _strokes.extend([_stroke_function(_geometry, _direction, _position)] * _times)
+        perform_strokes(driver, _strokes)
+    elif op['op'] == "fill":
+        action_additional.fill_form(driver, op['fields'], snapshot=snapshot)
+    elif op['op'] == "screen":
+        # The page source is taken after the screen is rendered.
+        if op['wait_xpath'] is not None:
+            find_element(driver, op['wait_xpath'])
+        _snapshot = take_snapshot(driver)
+        for _op in op['ops']:
+            _execute_op(driver, _op, _snapshot)
+    elif op['function'] in _LOOKUP_ACTIONS:
+        _FUNCTIONS[op['function']](driver, *op['args'], snapshot=snapshot, **op['kwargs'])
+    else:
+        _FUNCTIONS[op['function']](driver, *op['args'], **op['kwargs'])
+
+    settle_ui(driver, op['settle'])
+
+
+def execute_plan(driver, plan):
+    """Run the plan.
+
+    :param WebDriver driver: WebDriver obj.
+    :param list plan: Plan from compile_scenario().
+    """
+    for _index, _op in enumerate(plan):
+        LOGGER.debug("[%s/%s] %s %s", _index + 1, len(plan), _op['op'], _op.get('function', ''))
+        _execute_op(driver, _op)
+
+
+def run_scenario(driver, path) -> list:
+    """Load, compile and run the scenario file.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str path: Scenario file path (.json, .yaml, .yml)
+    :return: Executed plan.
+    :rtype: list.
+    """
+    _plan = compile_scenario(load_scenario(path))
+    execute_plan(driver, _plan)
+    LOGGER.info("Run the scenario %s is finish.", path)
+    return _plan
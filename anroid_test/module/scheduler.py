@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+"""Duration-aware scheduler.
+Run more scenarios than devices on the device pool. The scenarios are assigned to the compatible devices
+from the longest one by the historical durations (LPT), and the idle device steals the remaining scenarios
+of the other devices. The scenario whose session became unhealthy (e.g. The device drops off USB) is requeued
+to another compatible device.
+
+    jobs = [{"name": "basic_touch", "scenario": run_basic_touch, "requires": {"platformVersion": ">=12"}},
+            {"name": "map_zoom", "scenario": run_map_zoom, "requires": {"formFactor": "tablet"}}]
+    run_scheduled(jobs, [galaxy_s20_capabilites, galaxy_tap_s6_lite_capabilities],
+                  traits={"R54T3022FVH": {"formFactor": "tablet"}})
+"""
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from appium import webdriver
+
+from anroid_test.module.async_logging import get_logger
+from anroid_test.module.geometry import clear_geometry
+from anroid_test.module.runner import DEFAULT_APPIUM_PORT, DEFAULT_SYSTEM_PORT, allocate_ports
+from anroid_test.module.service_manager import AppiumServiceManager
+from anroid_test.module.session_health import HealthMonitor, SessionUnhealthyError
+
+LOGGER = get_logger(__name__)
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".anroid_test", "durations.json")
+# Estimated duration of the scenario which has no history, in seconds.
+DEFAULT_DURATION = 60.0
+# Weight of the latest duration in the moving average.
+HISTORY_WEIGHT = 0.3
+# The number of tries of the job whose session became unhealthy.
+MAX_ATTEMPTS = 2
+# The device is retired after this number of unhealthy sessions in a row.
+MAX_SESSION_FAILURES = 2
+
+_REQUIREMENT_PATTERN = re.compile(r"\s*(>=|<=|==|!=|>|<)?\s*(.*?)\s*")
+
+
+class DurationHistory:
+    """Historical durations of the scenarios on the local disk."""
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        """Initialize the DurationHistory.
+
+        :param str path: JSON file path. (default=~/.anroid_test/durations.json)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._durations = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._durations = {}
+
+    def estimate(self, name) -> float:
+        """Return the estimated duration of the scenario.
+
+        :param str name: Scenario name.
+        :return: Estimated duration, in seconds. The average of all scenarios if it has no history.
+        :rtype: float.
+        """
+        with self._lock:
+            if name in self._durations:
+                return self._durations[name]['mean']
+            if self._durations:
+                return sum(_entry['mean'] for _entry in self._durations.values()) / len(self._durations)
+        return DEFAULT_DURATION
+
+    def record(self, name, seconds):
+        """Add the duration of the scenario into the moving average.
+
+        :param str name: Scenario name.
+        :param float seconds: Duration, in seconds.
+        """
+        with self._lock:
+            _entry = self._durations.get(name)
+            if _entry is None:
+                self._durations[name] = {"mean": seconds, "count": 1}
+            else:
+                _entry['mean'] = _entry['mean'] * (1 - HISTORY_WEIGHT) + seconds * HISTORY_WEIGHT
+                _entry['count'] += 1
+
+    def save(self):
+        """Save the durations into the JSON file."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock:
+            _temp_path = f"{self.path}.tmp"
+            with open(_temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._durations, f, ensure_ascii=False, indent=2)
+            os.replace(_temp_path, self.path)
+
+
+def _version(value) -> tuple:
+    """Convert the version string into the comparable tuple.
+
+    :param str value: Version string. (e.g. 12, 13.0.1)
+    :return: Version tuple.
+    :rtype: tuple.
+    """
+    return tuple(int(_number) for _number in re.findall(r"\d+", str(value)))
+
+
+def _match_requirement(requirement, value) -> bool:
+    """Check the device value satisfies the requirement.
+
+    :param requirement: Requirement value. (e.g. ">=12", "tablet", ["phone", "tablet"])
+    :param value: Device value.
+    :return: True if the value satisfies the requirement.
+    :rtype: bool.
+    """
+    if isinstance(requirement, (list, tuple)):
+        return any(_match_requirement(_requirement, value) for _requirement in requirement)
+    if value is None:
+        return False
+
+    _operator, _expected = _REQUIREMENT_PATTERN.fullmatch(str(requirement)).groups()
+    if _operator is None:
+        return str(value).lower() == _expected.lower()
+
+    _value, _expected = _version(value), _version(_expected)
+    return {">=": _value >= _expected, "<=": _value <= _expected, "==": _value == _expected,
+            "!=": _value != _expected, ">": _value > _expected, "<": _value < _expected}[_operator]
+
+
+def is_compatible(requires, device) -> bool:
+    """Check the device satisfies all requirements of the scenario.
+
+    :param dict requires: Requirement by capability or trait name. (e.g. {"platformVersion": ">=12"})
+    :param dict device: Capabilities and traits of the device.
+    :return: True if all requirements are satisfied.
+    :rtype: bool.
+    """
+    return all(_match_requirement(_requirement, device.get(_name)) for _name, _requirement in (requires or {}).items())
+
+
+def plan_assignments(jobs, devices, history) -> dict:
+    """Assign the jobs to the compatible devices from the longest job. (Longest processing time first)
+
+    :param list jobs: Job list [{"name", "scenario", "requires"}, ...].
+    :param dict devices: Capabilities and traits by device name {deviceName: {...}}.
+    :param DurationHistory history: Duration history.
+    :return: Job name list by device name {deviceName: [name, ...]}, and the jobs which no device can run under None.
+    :rtype: dict.
+    """
+    _assignments = {_device_name: [] for _device_name in devices}
+    _assignments[None] = []
+    _loads = {_device_name: 0.0 for _device_name in devices}
+    for _job in sorted(jobs, key=lambda _job: history.estimate(_job['name']), reverse=True):
+        _compatible = [_name for _name, _device in devices.items() if is_compatible(_job.get('requires'), _device)]
+        if not _compatible:
+            _assignments[None].append(_job['name'])
+            continue
+        _device_name = min(_compatible, key=lambda _name: _loads[_name])
+        _assignments[_device_name].append(_job['name'])
+        _loads[_device_name] += history.estimate(_job['name'])
+    return _assignments
+
+
+class _JobQueues:
+    """Job queues of the devices which allow the work stealing and the requeue."""
+
+    def __init__(self, assignments, jobs, devices):
+        """Initialize the _JobQueues.
+
+        :param dict assignments: Job name list by device name from plan_assignments().
+        :param dict jobs: Job by name.
+        :param dict devices: Capabilities and traits by device name.
+        """
+        self._condition = threading.Condition()
+        self._queues = {_name: [jobs[_job_name] for _job_name in _job_names]
+                        for _name, _job_names in assignments.items() if _name is not None}
+        self._devices = devices
+        self._retired = set()
+        self._attempts = {}
+        self._failed_devices = {}
+        self._running = 0
+
+    def _pop(self, device_name):
+        """Pop the job of the device. Steal the shortest compatible job of the busiest device if it is idle.
+
+        :param str device_name: Device name.
+        :return: Job or None if there is no compatible job.
+        :rtype: dict.
+        """
+        if self._queues[device_name]:
+            return self._queues[device_name].pop(0)
+
+        for _victim in sorted(self._queues, key=lambda _name: len(self._queues[_name]), reverse=True):
+            for _index in range(len(self._queues[_victim]) - 1, -1, -1):
+                _job = self._queues[_victim][_index]
+                # The requeued job is not taken back by the device which could not finish it.
+                if device_name in self._failed_devices.get(_job['name'], ()):
+                    continue
+                if is_compatible(_job.get('requires'), self._devices[device_name]):
+                    LOGGER.debug("%s steals %s from %s.", device_name, _job['name'], _victim)
+                    return self._queues[_victim].pop(_index)
+        return None
+
+    def next_job(self, device_name):
+        """Return the next job of the device. Wait while the running jobs can be requeued.
+
+        :param str device_name: Device name.
+        :return: Job or None if there is no job to run.
+        :rtype: dict.
+        """
+        with self._condition:
+            while True:
+                _job = self._pop(device_name)
+                if _job is not None:
+                    self._running += 1
+                    return _job
+                if self._running == 0:
+                    return None
+                self._condition.wait()
+
+    def task_done(self):
+        """Notify the job from next_job() is finished or requeued."""
+        with self._condition:
+            self._running -= 1
+            self._condition.notify_all()
+
+    def requeue(self, job, device_name) -> bool:
+        """Put the job of the unhealthy session into the compatible device queue which has the least jobs.
+
+        :param dict job: Job.
+        :param str device_name: Device name which could not finish the job.
+        :return: False if the job is tried MAX_ATTEMPTS times or no device can run it.
+        :rtype: bool.
+        """
+        with self._condition:
+            self._attempts[job['name']] = self._attempts.get(job['name'], 1) + 1
+            self._failed_devices.setdefault(job['name'], set()).add(device_name)
+            if self._attempts[job['name']] > MAX_ATTEMPTS:
+                return False
+
+            _compatible = [_name for _name in self._queues if _name not in self._retired
+                           and is_compatible(job.get('requires'), self._devices[_name])]
+            if not _compatible:
+                return False
+            # The other device is preferred. (The same device runs it after recreating the session)
+            _target = min(_compatible, key=lambda _name: (_name == device_name, len(self._queues[_name])))
+            self._queues[_target].insert(0, job)
+            LOGGER.info("Requeue %s from %s to %s.", job['name'], device_name, _target)
+            self._condition.notify_all()
+            return True
+
+    def retire(self, device_name):
+        """Stop assigning the requeued jobs to the device. The other devices steal its remaining jobs.
+
+        :param str device_name: Device name.
+        """
+        with self._condition:
+            self._retired.add(device_name)
+            self._condition.notify_all()
+
+    def remaining(self) -> list:
+        """Return the jobs which no device took.
+
+        :return: Job list.
+        :rtype: list.
+        """
+        with self._condition:
+            return [_job for _queue in self._queues.values() for _job in _queue]
+
+
+def _run_device_jobs(queues, device_name, capabilities, port, system_port, args, history, results):
+    """Start the Appium service of the device and run the jobs until no job is left.
+    The job of the unhealthy session is requeued, and the device is retired after MAX_SESSION_FAILURES
+    consecutive unhealthy sessions.
+
+    :param _JobQueues queues: Job queues.
+    :param str device_name: Device name.
+    :param dict capabilities: Device capabilities.
+    :param int port: Appium service port.
+    :param int system_port: UiAutomator2 systemPort.
+    :param list args: Additional Appium arguments.
+    :param DurationHistory history: Duration history.
+    :param dict results: Result by job name to fill.
+    """
+    _capabilities = dict(capabilities, systemPort=system_port)
+    _driver = None
+    _monitor = None
+    _session_failures = 0
+    try:
+        _service_manager = AppiumServiceManager(port, args=args, keep_alive=False).start()
+    except Exception:
+        LOGGER.exception(f"Appium service of {device_name} does not start. Retire {device_name}.")
+        queues.retire(device_name)
+        return
+
+    try:
+        while _session_failures < MAX_SESSION_FAILURES and (_job := queues.next_job(device_name)) is not None:
+            _result = {"device": device_name, "result": None, "error": None, "elapsed": 0.0}
+            _start_time = time.monotonic()
+            _requeued = False
+            try:
+                if _driver is None:
+                    try:
+                        _driver = webdriver.Remote(_service_manager.url, _capabilities)
+                    except Exception as e:
+                        raise SessionUnhealthyError(f"Could not connect {device_name}. ({e})") from e
+                    _monitor = HealthMonitor(_driver).start()
+                    LOGGER.info("%s is connected.", device_name)
+                _result['result'] = _job['scenario'](_driver)
+                history.record(_job['name'], time.monotonic() - _start_time)
+                _session_failures = 0
+            except Exception as e:
+                _unhealthy = isinstance(e, SessionUnhealthyError) or (_monitor is not None and not _monitor.is_healthy)
+                LOGGER.exception(f"{_job['name']} on {device_name} is failed.")
+                _result['error'] = e
+                # The next job starts from the new session.
+                if _driver is not None:
+                    _quit_driver(_driver, _monitor, device_name)
+                    _driver, _monitor = None, None
+                if _unhealthy:
+                    _session_failures += 1
+                    _requeued = queues.requeue(_job, device_name)
+            finally:
+                queues.task_done()
+            if not _requeued:
+                _result['elapsed'] = time.monotonic() - _start_time
+                results[_job['name']] = _result
+
+        if _session_failures >= MAX_SESSION_FAILURES:
+            LOGGER.warning("%s has %s unhealthy sessions in a row. Retire %s.",
+                           device_name, _session_failures, device_name)
+            queues.retire(device_name)
+    finally:
+        if _driver is not None:
+            _quit_driver(_driver, _monitor, device_name)
+        _service_manager.stop()
+
+
+def _quit_driver(driver, monitor, device_name):
+    """Quit the session and ignore the error of the broken session.
+
+    :param WebDriver driver: WebDriver obj.
+    :param HealthMonitor monitor: Health monitor of the session.
+    :param str device_name: Device name.
+    """
+    clear_geometry(driver)
+    try:
+        # The unhealthy session is not waited. (Appium server removes it after newCommandTimeout)
+        driver.quit()
+    except Exception:
+        LOGGER.warning("Could not quit the session of %s.", device_name)
+    finally:
+        monitor.stop()
+    LOGGER.info("%s is disconnected.", device_name)
+
+
+def run_scheduled(jobs, capabilities_list, traits=None, history_path=DEFAULT_HISTORY_PATH, args=None,
+                  base_port=DEFAULT_APPIUM_PORT, base_system_port=DEFAULT_SYSTEM_PORT) -> dict:
+    """Run the jobs on the device pool by the duration-aware schedule.
+
+    :param list jobs: Job list [{"name": str, "scenario": callable, "requires": dict}, ...].
+    :param list capabilities_list: Capabilities dictionary list of the devices.
+    :param dict traits: Additional traits by device name which are not capabilities.
+        (e.g. {deviceName: {"formFactor": "tablet"}})
+    :param str history_path: Duration history JSON file path. (default=~/.anroid_test/durations.json)
+    :param list args: Additional Appium arguments. (default=None)
+    :param int base_port: The first Appium service port to try. (default=4723)
+    :param int base_system_port: The first systemPort to try. (default=8200)
+    :return: Result by job name {name: {"device", "result", "error", "elapsed"}}.
+    :rtype: dict.
+    """
+    args = [] if args is None else args
+    traits = {} if traits is None else traits
+    if not capabilities_list:
+        LOGGER.warning("No device to run the jobs.")
+        return {_job['name']: {"device": None, "result": None, "error": ValueError("No compatible device"),
+                               "elapsed": 0.0} for _job in jobs}
+    _devices = {_capabilities['deviceName']: dict(_capabilities, **traits.get(_capabilities['deviceName'], {}))
+                for _capabilities in capabilities_list}
+    _jobs = {_job['name']: _job for _job in jobs}
+    _history = DurationHistory(history_path)
+
+    _assignments = plan_assignments(jobs, _devices, _history)
+    _results = {}
+    for _job_name in _assignments[None]:
+        LOGGER.warning("No device can run %s.", _job_name)
+        _results[_job_name] = {"device": None, "result": None, "error": ValueError("No compatible device"),
+                               "elapsed": 0.0}
+
+    _estimates = [_history.estimate(_job['name']) for _job in jobs if _job['name'] not in _assignments[None]]
+    if _estimates:
+        LOGGER.info("Estimated lower bound of the wall time is %.1f sec.",
+                    max(max(_estimates), sum(_estimates) / len(_devices)))
+
+    _queues = _JobQueues(_assignments, _jobs, _devices)
+    _ports = allocate_ports(len(capabilities_list), base_port, base_system_port)
+    _start_time = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=len(capabilities_list)) as _executor:
+            _futures = [_executor.submit(_run_device_jobs, _queues, _capabilities['deviceName'], _capabilities,
+                                         _port, _system_port, args, _history, _results)
+                        for _capabilities, (_port, _system_port) in zip(capabilities_list, _ports)]
+            for _future in _futures:
+                _future.result()
+    finally:
+        _history.save()
+
+    for _job in _queues.remaining():
+        LOGGER.warning("No healthy device can run %s.", _job['name'])
+        _results[_job['name']] = {"device": None, "result": None, "error": SessionUnhealthyError("No healthy device"),
+                                  "elapsed": 0.0}
+    LOGGER.info("Run %s jobs on %s devices in %.1f sec.",
+                len(jobs), len(capabilities_list), time.monotonic() - _start_time)
+    return _results
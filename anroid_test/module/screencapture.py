@@ -3,35 +3,122 @@
 ()
 """
 import os
-import logging
+import base64
 import datetime
+import threading
+import http.server
+from concurrent.futures import ThreadPoolExecutor
 
-from miraelogger import Logger
+from anroid_test.module.artifact_store import get_artifact_store
+from anroid_test.module.async_logging import get_logger
 
-LOGGER = Logger(log_name=__name__, stream_log_level=logging.DEBUG)
+LOGGER = get_logger(__name__)
 
+# The page source and the screenshot are fetched in the caller, and only the files are written on one background writer.
+_WRITE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ui_dump_write")
 
-def save_ui_dump(driver, directory_path, is_mobile=True):
-    """Save Screenshot and XML into local.
+# Base64 decoding and streaming chunk size. (It must be divisible by 4)
+RECORDING_CHUNK_SIZE = 1024 * 1024
+RECORDING_SINK_TIMEOUT = 60
+
+_reserved_names = set()
+_name_lock = threading.Lock()
+
+
+def _reserve_name(directory_path, extensions) -> str:
+    """Reserve the file name which does not collide with the other dumps.
+
+    :param str directory_path: Directory path to save files.
+    :param list extensions: File extensions which use the name.
+    :return: Reserved file name without the extension.
+    :rtype: str.
+    """
+    _base_name = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    with _name_lock:
+        _name = _base_name
+        _index = 1
+        while _name in _reserved_names or \
+                any(os.path.exists(os.path.join(directory_path, f"{_name}.{_ext}")) for _ext in extensions):
+            _name = f"{_base_name}_{_index}"
+            _index += 1
+        _reserved_names.add(_name)
+    return _name
+
+
+def _write_ui_dump(name, page_source, screenshot, page_path, screenshot_path) -> tuple:
+    """Write the fetched page source and screenshot into local.
+
+    :param str name: Reserved file name.
+    :param str page_source: Page source.
+    :param bytes screenshot: Screenshot PNG bytes.
+    :param str page_path: Page source file path.
+    :param str screenshot_path: Screenshot file path.
+    :return: Saved file paths (page_path, screenshot_path).
+    :rtype: tuple.
+    """
+    try:
+        with open(page_path, 'w', encoding='utf-8') as f:
+            f.write(page_source)
+
+        with open(screenshot_path, 'wb') as f:
+            f.write(screenshot)
+
+        LOGGER.debug("Save the UI dump '%s' is success.", name)
+        return page_path, screenshot_path
+    except Exception:
+        LOGGER.exception(f"Save the UI dump '{name}' is failed.")
+        raise
+    finally:
+        with _name_lock:
+            _reserved_names.discard(name)
+
+
+def _store_ui_dump(store, step, page_source, screenshot) -> dict:
+    """Store the fetched page source and screenshot into the artifact store.
+
+    :param ArtifactStore store: Artifact store.
+    :param str step: Step name which references the dump.
+    :param str page_source: Page source.
+    :param bytes screenshot: Screenshot PNG bytes.
+    :return: Index record {"step", "time", "page", "screenshot"}.
+    :rtype: dict.
+    """
+    try:
+        _record = store.add_dump(page_source, screenshot, step)
+        LOGGER.debug("Store the UI dump (page=%s, screenshot=%s).", _record['page'][:8], _record['screenshot'][:8])
+        return _record
+    except Exception:
+        LOGGER.exception(f"Store the UI dump of '{step}' is failed.")
+        raise
+
+
+def save_ui_dump(driver, directory_path, is_mobile=True, deduplicate=False, step=None):
+    """Save Screenshot and XML into local. The screen is captured before returning, and the files are written
+    without blocking the test.
 
     :param WebDriver driver: WebDriver obj.
     :param str directory_path: Directory path to save files.
     :param bool is_mobile: Is mobile option. (default=True)
+    :param bool deduplicate: Save into the content-addressed artifact store of the directory. (default=False)
+    :param str step: Step name which is recorded in the artifact store index. (default=None)
+    :return: Future of the saved file paths (page_path, screenshot_path) or the index record if deduplicate is True.
+    :rtype: concurrent.futures.Future.
     """
-    _current_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    # Web: page source, Mobile: XML
+    # Appium runs the commands of the session one by one, and the next action must not change the captured screen.
     _page_source = driver.page_source
-    if is_mobile:
-        _page_path = os.path.join(directory_path, f"{_current_time}.xml")
-    else:
-        _page_path = os.path.join(directory_path, f"{_current_time}.html")
+    _screenshot = driver.get_screenshot_as_png()
+
+    if deduplicate:
+        return _WRITE_EXECUTOR.submit(_store_ui_dump, get_artifact_store(directory_path), step, _page_source,
+                                      _screenshot)
 
-    with open(_page_path, 'w', encoding='utf-8') as f:
-        f.write(_page_source)
+    # Web: page source, Mobile: XML
+    _page_extension = "xml" if is_mobile else "html"
+    _name = _reserve_name(directory_path, [_page_extension, "png"])
+    _page_path = os.path.join(directory_path, f"{_name}.{_page_extension}")
+    _screenshot_path = os.path.join(directory_path, f"{_name}.png")
 
-    _screenshot_path = os.path.join(directory_path, f"{_current_time}.png")
-    _screenshot = driver.save_screenshot(_screenshot_path)
+    return _WRITE_EXECUTOR.submit(_write_ui_dump, _name, _page_source, _screenshot, _page_path, _screenshot_path)
 
 
 # ScreenRecord (appium/webdriver/extensions/screen_record.py)
@@ -43,11 +130,149 @@ def start_recording(driver):
     driver.start_recording_screen()
 
 
-def stop_recording(driver, path):
+def _write_file_part(f, chunks, boundary) -> bool:
+    """Write the file part of the multipart/form-data body into the file by chunk.
+
+    :param file f: Target file obj.
+    :param iterator chunks: Chunks of the request body.
+    :param bytes boundary: Multipart boundary.
+    :return: True if the file part is written.
+    :rtype: bool.
+    """
+    # The first delimiter does not have the leading CRLF, so the CRLF is prepended.
+    _delimiter = b"\r\n--" + boundary
+    _buffer = b"\r\n"
+    _in_file = False
+    while True:
+        _index = _buffer.find(_delimiter)
+        if _index < 0:
+            # The tail can be the start of the delimiter.
+            _keep = len(_delimiter) - 1
+            if len(_buffer) > _keep:
+                if _in_file:
+                    f.write(_buffer[:-_keep])
+                _buffer = _buffer[-_keep:]
+            _chunk = next(chunks, None)
+            if _chunk is None:
+                return False
+            _buffer += _chunk
+            continue
+        if _in_file:
+            f.write(_buffer[:_index])
+            return True
+
+        _buffer = _buffer[_index + len(_delimiter):]
+        while (_end := _buffer.find(b"\r\n\r\n")) < 0:
+            _chunk = next(chunks, None)
+            if _chunk is None:
+                return False
+            _buffer += _chunk
+        # The form fields do not have the file name. (e.g. Content-Disposition: form-data; name="file"; filename="...")
+        _in_file = b"filename=" in _buffer[:_end]
+        _buffer = _buffer[_end + 4:]
+
+
+class _RecordingSinkHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP handler which streams the uploaded video into the sink file.
+    Appium uploads the video as the multipart/form-data by default, so only the file part is written.
+    """
+
+    def _receive(self):
+        """Stream the request body into the sink file."""
+        _chunks = self._iter_body()
+        with open(self.server.file_path, 'wb') as f:
+            if self.headers.get_content_type() == "multipart/form-data":
+                if not _write_file_part(f, _chunks, self.headers.get_param('boundary').encode()):
+                    LOGGER.warning("Recording sink could not find the file part in the upload.")
+            else:
+                for _chunk in _chunks:
+                    f.write(_chunk)
+        # Read the rest of the body. (e.g. The closing delimiter)
+        for _ in _chunks:
+            pass
+
+        self.send_response(200)
+        self.end_headers()
+
+    def _iter_body(self):
+        """Yield the request body by chunk.
+
+        :return: Generator of the chunks.
+        :rtype: generator.
+        """
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            while (_chunk_size := int(self.rfile.readline().split(b';')[0].strip(), 16)) > 0:
+                yield from self._iter_bytes(_chunk_size)
+                self.rfile.readline()
+            self.rfile.readline()
+        else:
+            yield from self._iter_bytes(int(self.headers.get('Content-Length', 0)))
+
+    def _iter_bytes(self, size):
+        """Yield the bytes of the request body by chunk.
+
+        :param int size: Size to read.
+        :return: Generator of the chunks.
+        :rtype: generator.
+        """
+        while size > 0:
+            _data = self.rfile.read(min(size, RECORDING_CHUNK_SIZE))
+            if not _data:
+                break
+            yield _data
+            size -= len(_data)
+
+    do_PUT = _receive
+    do_POST = _receive
+
+    def log_message(self, format, *args):
+        """Do not print the access log to stderr."""
+        LOGGER.debug("Recording sink: " + format, *args)
+
+
+def _decode_to_file(video_data, path):
+    """Decode the base64 video data into the file by chunk.
+
+    :param Union[str, bytes] video_data: Base64 encoded video data.
+    :param str path: Video file path.
+    """
+    # The chunk boundary must be aligned by 4 characters, so the line breaks are removed first.
+    video_data = "".join(video_data.split()) if isinstance(video_data, str) else b"".join(video_data.split())
+
+    with open(path, 'wb') as f:
+        for _start in range(0, len(video_data), RECORDING_CHUNK_SIZE):
+            f.write(base64.b64decode(video_data[_start:_start + RECORDING_CHUNK_SIZE]))
+
+
+def _receive_by_sink(driver, path, host):
+    """Let the Appium server upload the video into the local HTTP sink.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str path: Video file path.
+    :param str host: Host address of the sink which the Appium server can access.
+    """
+    _server = http.server.HTTPServer((host, 0), _RecordingSinkHandler)
+    _server.file_path = path
+    _server.timeout = RECORDING_SINK_TIMEOUT
+    _thread = threading.Thread(target=_server.handle_request, name="recording_sink", daemon=True)
+    _thread.start()
+    try:
+        driver.stop_recording_screen(remotePath=f"http://{host}:{_server.server_port}/{os.path.basename(path)}",
+                                     method="PUT")
+        _thread.join(RECORDING_SINK_TIMEOUT)
+    finally:
+        _server.server_close()
+
+
+def stop_recording(driver, path, use_sink=False, sink_host="127.0.0.1"):
     """Stop recording and save video file into local.
 
     :param WebDriver driver: WebDriver obj.
     :param str path: Directory path or file path (which include the .mp4) to save files.
+    :param bool use_sink: Upload the video into the local HTTP sink using remotePath option instead of the response. (default=False)
+    :param str sink_host: Host address of the sink which the Appium server can access. (default=127.0.0.1)
+    :return: Saved video file path.
+    :rtype: str.
     """
     _current_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     if ".mp4" not in path:
@@ -55,6 +280,8 @@ def stop_recording(driver, path):
     else:
         _path = path
 
-    _video_data = driver.stop_recording_screen()
-    with open(_path, 'wb') as f:
-        f.write(_video_data)
+    if use_sink:
+        _receive_by_sink(driver, _path, sink_host)
+    else:
+        _decode_to_file(driver.stop_recording_screen(), _path)
+    return _path
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""Appium service manager.
+Reuse the running Appium server if it is healthy, otherwise start it and poll '/status' until it is ready.
+The started server is kept alive across the scripts with the PID file, and the supervisor restarts it on crash.
+The args of the started server are recorded next to the PID file. The reused server must have been started with the
+requested args, otherwise AppiumServiceError is raised.
+
+    with AppiumServiceManager(4723, args=["--relaxed-security"]) as _manager:
+        _driver = webdriver.Remote(_manager.url, capabilities)
+"""
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import appium.webdriver.appium_service
+
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+DEFAULT_APPIUM_PORT = 4723
+DEFAULT_STARTUP_TIMEOUT = 60.0
+# Directory of the PID, args, lock and log files which are shared by the scripts.
+STATE_DIRECTORY = os.path.join(tempfile.gettempdir(), "anroid_test_appium")
+
+
+def probe_status(port=DEFAULT_APPIUM_PORT, host="127.0.0.1", base_path="", timeout=0.5) -> bool:
+    """Check the Appium server is ready.
+
+    :param int port: Appium server port. (default=4723)
+    :param str host: Appium server host. (default=127.0.0.1)
+    :param str base_path: Appium server base path. (e.g. /wd/hub, default="")
+    :param float timeout: HTTP timeout, in seconds. (default=0.5)
+    :return: True if '/status' answers the ready.
+    :rtype: bool.
+    """
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}{base_path}/status", timeout=timeout) as _response:
+            _value = json.loads(_response.read() or b"{}").get('value') or {}
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+    return _value.get('ready', True) is not False
+
+
+def wait_until_ready(port=DEFAULT_APPIUM_PORT, host="127.0.0.1", base_path="", timeout=DEFAULT_STARTUP_TIMEOUT,
+                     interval=0.01, max_interval=0.25, backoff=1.5) -> bool:
+    """Poll '/status' with the tight backoff until the Appium server is ready.
+
+    :param int port: Appium server port. (default=4723)
+    :param str host: Appium server host. (default=127.0.0.1)
+    :param str base_path: Appium server base path. (default="")
+    :param float timeout: The ceiling of waiting time, in seconds. (default=60.0)
+    :param float interval: The first polling interval, in seconds. (default=0.01)
+    :param float max_interval: The maximum polling interval, in seconds. (default=0.25)
+    :param float backoff: Multiplier of the polling interval. (default=1.5)
+    :return: True if the server is ready, False if the timeout is over.
+    :rtype: bool.
+    """
+    _start_time = time.monotonic()
+    _deadline = _start_time + timeout
+    while True:
+        if probe_status(port, host, base_path, timeout=max(interval, 0.1)):
+            LOGGER.debug("Appium server on %s is ready in %.2f sec.", port, time.monotonic() - _start_time)
+            return True
+        _remain = _deadline - time.monotonic()
+        if _remain <= 0:
+            return False
+        time.sleep(min(interval, _remain))
+        interval = min(interval * backoff, max_interval)
+
+
+class AppiumServiceManager:
+    """Start or reuse the Appium server on the port.
+    The args are used only when the server is started. The reused server keeps the args of the script which started it,
+    so it is checked that they include the requested args.
+    """
+
+    def __init__(self, port=DEFAULT_APPIUM_PORT, args=None, host="127.0.0.1", base_path="",
+                 startup_timeout=DEFAULT_STARTUP_TIMEOUT, keep_alive=True):
+        """Initialize the AppiumServiceManager.
+
+        :param int port: Appium server port. (default=4723)
+        :param list args: Additional Appium arguments. (e.g. ["--relaxed-security"], default=None)
+        :param str host: Appium server host. (default=127.0.0.1)
+        :param str base_path: Appium server base path. (default="")
+        :param float startup_timeout: The ceiling of waiting for the server start, in seconds. (default=60.0)
+        :param bool keep_alive: Keep the server alive after stop() for the next scripts. (default=True)
+        """
+        self.port = port
+        self.args = [] if args is None else list(args)
+        self.host = host
+        self.base_path = base_path
+        self.startup_timeout = startup_timeout
+        self.keep_alive = keep_alive
+        self._service = None
+        self._supervisor = None
+        self._stop_event = threading.Event()
+        self._restart_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """Appium server URL."""
+        return f"http://{self.host}:{self.port}{self.base_path}"
+
+    @property
+    def _pid_path(self) -> str:
+        return os.path.join(STATE_DIRECTORY, f"appium-{self.port}.pid")
+
+    @property
+    def _args_path(self) -> str:
+        return os.path.join(STATE_DIRECTORY, f"appium-{self.port}.args")
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(STATE_DIRECTORY, f"appium-{self.port}.lock")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(STATE_DIRECTORY, f"appium-{self.port}.log")
+
+    def is_ready(self) -> bool:
+        """Check the server is ready.
+
+        :return: True if '/status' answers the ready.
+        :rtype: bool.
+        """
+        return probe_status(self.port, self.host, self.base_path)
+
+    def _acquire_lock(self) -> bool:
+        """Acquire the start lock of the port, which is shared by the scripts.
+
+        :return: True if the lock is acquired, False if the other script made the server ready meanwhile.
+        :rtype: bool.
+        """
+        os.makedirs(STATE_DIRECTORY, exist_ok=True)
+        _deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                _fd = os.open(self._lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(_fd, str(os.getpid()).encode())
+                os.close(_fd)
+                return True
+            except FileExistsError:
+                pass
+
+            if self.is_ready():
+                return False
+            try:
+                # The lock of the crashed script is older than the startup timeout.
+                if time.time() - os.path.getmtime(self._lock_path) > self.startup_timeout:
+                    LOGGER.warning("Remove the stale lock %s", self._lock_path)
+                    os.remove(self._lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > _deadline:
+                LOGGER.exception(msg := f"Could not acquire the lock {self._lock_path} within "
+                                        f"{self.startup_timeout} sec.")
+                raise TimeoutError(msg)
+            time.sleep(0.05)
+
+    def _release_lock(self):
+        """Release the start lock of the port."""
+        try:
+            os.remove(self._lock_path)
+        except FileNotFoundError:
+            pass
+
+    def _read_pid(self):
+        """Return the PID of the server which is started by the scripts.
+
+        :return: PID or None.
+        :rtype: int.
+        """
+        try:
+            with open(self._pid_path, 'r', encoding='utf-8') as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _read_args(self):
+        """Return the args of the server which is started by the scripts.
+
+        :return: Args list or None if the server is not started by the scripts.
+        :rtype: list.
+        """
+        try:
+            with open(self._args_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _check_reused_args(self):
+        """Check the reused server was started with the requested args. (e.g. --relaxed-security for adb shell)"""
+        if not self.args:
+            return
+
+        _recorded = self._read_args()
+        if _recorded is None:
+            LOGGER.warning("Appium server on %s is not started by the scripts. Could not check it has the args %s",
+                           self.port, self.args)
+            return
+        _missing = [_arg for _arg in self.args if _arg not in _recorded]
+        if _missing:
+            LOGGER.exception(msg := f"Appium server on {self.port} is started without the args {_missing}. "
+                                    f"Please stop it or use the other port.")
+            raise appium.webdriver.appium_service.AppiumServiceError(msg)
+
+    def _launch(self):
+        """Start the Appium server process and wait until it is ready. It must be called with the lock."""
+        _log_file = open(self._log_path, 'ab')
+        self._service = appium.webdriver.appium_service.AppiumService()
+        try:
+            # timeout_ms=0 skips the fixed polling of AppiumService, and wait_until_ready() polls with the backoff.
+            _args = ["--address", self.host, "--port", str(self.port), *self.args]
+            if self.base_path:
+                _args += ["--base-path", self.base_path]
+            _process = self._service.start(args=_args, timeout_ms=0, stdout=_log_file, stderr=_log_file)
+        finally:
+            _log_file.close()
+
+        with open(self._pid_path, 'w', encoding='utf-8') as f:
+            f.write(str(_process.pid))
+        with open(self._args_path, 'w', encoding='utf-8') as f:
+            json.dump(self.args, f)
+
+        if not wait_until_ready(self.port, self.host, self.base_path, self.startup_timeout):
+            self._service.stop()
+            self._service = None
+            LOGGER.exception(msg := f"Appium server on {self.port} is not ready within {self.startup_timeout} sec. "
+                                    f"Please check {self._log_path}")
+            raise appium.webdriver.appium_service.AppiumServiceError(msg)
+        LOGGER.info("Appium service start on %s (pid=%s)", self.port, _process.pid)
+
+    def start(self):
+        """Reuse the healthy server or start the new server.
+
+        :return: self.
+        :rtype: AppiumServiceManager.
+        """
+        if self.is_ready():
+            LOGGER.info("Reuse the Appium server on %s", self.port)
+            self._check_reused_args()
+            return self
+
+        if not self._acquire_lock():
+            LOGGER.info("Reuse the Appium server on %s which the other script started", self.port)
+            self._check_reused_args()
+            return self
+        try:
+            if self.is_ready():
+                self._check_reused_args()
+                return self
+            self._kill_recorded_process()
+            self._launch()
+        finally:
+            self._release_lock()
+        return self
+
+    def _kill_recorded_process(self):
+        """Kill the server process in the PID file. (e.g. The server which does not answer)"""
+        _pid = self._read_pid()
+        if _pid is None:
+            return
+
+        try:
+            os.kill(_pid, signal.SIGTERM)
+            LOGGER.warning("Kill the Appium server process %s on %s", _pid, self.port)
+        except OSError:
+            pass
+        for _path in [self._pid_path, self._args_path]:
+            try:
+                os.remove(_path)
+            except FileNotFoundError:
+                pass
+
+    def restart(self):
+        """Kill and start the server again."""
+        with self._restart_lock:
+            if self._service is not None:
+                self._service.stop()
+                self._service = None
+            self._kill_recorded_process()
+            self.start()
+
+    def supervise(self, interval=5.0, failures=2):
+        """Start the supervisor thread which restarts the server on crash.
+
+        :param float interval: Health check interval, in seconds. (default=5.0)
+        :param int failures: The number of the failed checks in a row before the restart. (default=2)
+        :return: self.
+        :rtype: AppiumServiceManager.
+        """
+        if self._supervisor is not None:
+            return self
+
+        self._stop_event.clear()
+        self._supervisor = threading.Thread(target=self._supervise, args=(interval, failures),
+                                            name=f"appium_supervisor_{self.port}", daemon=True)
+        self._supervisor.start()
+        return self
+
+    def _supervise(self, interval, failures):
+        """Check the server health and restart it.
+
+        :param float interval: Health check interval, in seconds.
+        :param int failures: The number of the failed checks in a row before the restart.
+        """
+        _failures = 0
+        while not self._stop_event.wait(interval):
+            if self.is_ready():
+                _failures = 0
+                continue
+
+            _failures += 1
+            if _failures < failures:
+                continue
+
+            LOGGER.warning("Appium server on %s is not healthy. Restart it.", self.port)
+            try:
+                self.restart()
+                _failures = 0
+            except Exception:
+                LOGGER.exception(f"Could not restart the Appium server on {self.port}")
+
+    def stop(self, force=False):
+        """Stop the supervisor. Stop the server too if keep_alive is False or force is True.
+
+        :param bool force: Stop the server even though keep_alive is True. (default=False)
+        """
+        self._stop_event.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+            self._supervisor = None
+
+        if self.keep_alive and not force:
+            LOGGER.info("Keep the Appium server on %s alive", self.port)
+            return
+
+        if self._service is not None:
+            self._service.stop()
+            self._service = None
+        self._kill_recorded_process()
+        LOGGER.info("Appium service stop on %s", self.port)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""Session health monitor.
+Probe the Appium server '/status' and the adb state of the device in the background. They are not queued behind the
+running command of the session (Appium runs the commands of the session one by one), so the probe answers while the
+command waits the dead device. When the device drops off USB or the Appium server does not answer, the session is
+marked unhealthy, and the waiting and the next commands of the driver raise SessionUnhealthyError at once instead of
+waiting the timeout of urllib3.
+The adb state is checked only when the server is on this host and adb is found.
+
+    with HealthMonitor(_driver):
+        run_basic_touch(_driver)
+"""
+import contextvars
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+DEFAULT_INTERVAL = 2.0
+DEFAULT_PROBE_TIMEOUT = 2.0
+DEFAULT_FAILURES = 2
+_LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class SessionUnhealthyError(Exception):
+    """The session does not answer. (e.g. The device is disconnected)"""
+
+
+def _server_address(driver) -> str:
+    """Return the Appium server address of the driver.
+
+    :param WebDriver driver: WebDriver obj.
+    :return: Server address. (e.g. http://127.0.0.1:4723)
+    :rtype: str.
+    """
+    _executor = driver.command_executor
+    _client_config = getattr(_executor, '_client_config', None)
+    if _client_config is not None:
+        return _client_config.remote_server_addr.rstrip('/')
+    return _executor._url.rstrip('/')
+
+
+def _find_adb():
+    """Return the adb path in PATH or ANDROID_HOME.
+
+    :return: adb path or None.
+    :rtype: str.
+    """
+    _adb_path = shutil.which("adb")
+    if _adb_path is None and os.environ.get('ANDROID_HOME'):
+        _adb_path = shutil.which("adb", path=os.path.join(os.environ['ANDROID_HOME'], "platform-tools"))
+    return _adb_path
+
+
+def _device_serial(driver):
+    """Return the adb serial of the session device.
+
+    :param WebDriver driver: WebDriver obj.
+    :return: Serial or None.
+    :rtype: str.
+    """
+    _capabilities = driver.capabilities or {}
+    return _capabilities.get('udid') or _capabilities.get('deviceUDID') or _capabilities.get('deviceName')
+
+
+def probe_server(server_address, timeout=DEFAULT_PROBE_TIMEOUT) -> bool:
+    """Check the Appium server answers '/status'. It is not queued behind the commands of the sessions.
+
+    :param str server_address: Appium server address. (e.g. http://127.0.0.1:4723)
+    :param float timeout: Request timeout, in seconds. (default=2.0)
+    :return: True if the server answers.
+    :rtype: bool.
+    """
+    try:
+        with urllib.request.urlopen(f"{server_address}/status", timeout=timeout) as _response:
+            return _response.status == 200
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+
+def probe_device(serial, adb_path="adb", timeout=DEFAULT_PROBE_TIMEOUT) -> bool:
+    """Check the device is online with 'adb get-state'.
+
+    :param str serial: adb serial of the device. (e.g. R3CN30XXXXX)
+    :param str adb_path: adb path. (default=adb)
+    :param float timeout: Command timeout, in seconds. (default=2.0)
+    :return: True if the state is 'device'. (False if it is offline, unauthorized or not found)
+    :rtype: bool.
+    """
+    try:
+        _output = subprocess.run([adb_path, "-s", serial, "get-state"], capture_output=True, text=True,
+                                 timeout=timeout)
+    except (subprocess.TimeoutExpired, OSError):
+        return False
+    return _output.returncode == 0 and _output.stdout.strip() == "device"
+
+
+class HealthMonitor:
+    """Probe the session of the driver in the background and fail its commands fast when it is unhealthy."""
+
+    def __init__(self, driver, interval=DEFAULT_INTERVAL, timeout=DEFAULT_PROBE_TIMEOUT, failures=DEFAULT_FAILURES):
+        """Initialize the HealthMonitor.
+
+        :param WebDriver driver: WebDriver obj.
+        :param float interval: Probe interval, in seconds. (default=2.0)
+        :param float timeout: Probe timeout, in seconds. (default=2.0)
+        :param int failures: The number of the consecutive failed probes to mark the session unhealthy. (default=2)
+        """
+        self.driver = driver
+        self.interval = interval
+        self.timeout = timeout
+        self.failures = failures
+        self.reason = None
+        self._execute = None
+        self._previous_execute = None
+        self._thread = None
+        self._worker = None
+        self._commands = None
+        self._stop_event = threading.Event()
+        self._unhealthy = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    @property
+    def is_healthy(self) -> bool:
+        """Return False after the session is marked unhealthy."""
+        return not self._unhealthy.is_set()
+
+    def start(self):
+        """Start the heartbeat thread. Wrap the execute method of the driver."""
+        if self._execute is not None:
+            return self
+
+        self._previous_execute = self.driver.__dict__.get('execute')
+        self._execute = self.driver.execute
+        self.driver.execute = self._monitored_execute
+        _server = _server_address(self.driver)
+        _adb_path = _find_adb() if urllib.parse.urlsplit(_server).hostname in _LOCAL_HOSTS else None
+        _serial = _device_serial(self.driver) if _adb_path is not None else None
+        if _serial is None:
+            LOGGER.debug("Session %s is probed without the adb state.", self.driver.session_id)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._heartbeat, args=(_server, _adb_path, _serial),
+                                        name=f"health-{self.driver.session_id}", daemon=True)
+        self._thread.start()
+        # One worker runs the commands, because Appium runs the commands of the session one by one too.
+        self._commands = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._work, args=(self._commands,),
+                                        name=f"command-{self.driver.session_id}", daemon=True)
+        self._worker.start()
+        return self
+
+    def stop(self):
+        """Stop the heartbeat thread. Restore the execute method of the driver."""
+        if self._execute is None:
+            return
+
+        self._stop_event.set()
+        if self._previous_execute is None:
+            del self.driver.execute
+        else:
+            self.driver.execute = self._previous_execute
+        self._execute = None
+        self._thread = None
+        # The worker which waits the dead device stops after urllib3 gives up.
+        self._commands.put(None)
+        self._commands = None
+        self._worker = None
+
+    def mark_unhealthy(self, reason):
+        """Mark the session unhealthy, and release the waiting commands.
+
+        :param str reason: Reason to log and to raise.
+        """
+        with self._lock:
+            if self._unhealthy.is_set():
+                return
+            self.reason = reason
+            self._unhealthy.set()
+            for _done in self._in_flight.values():
+                _done.set()
+        LOGGER.warning("Session %s is unhealthy. (%s)", self.driver.session_id, reason)
+
+    def _probe(self, server_address, adb_path, serial):
+        """Probe the server and the device once.
+
+        :param str server_address: Appium server address.
+        :param str adb_path: adb path or None to skip the device.
+        :param str serial: adb serial of the device.
+        :return: Failure reason or None if they are healthy.
+        :rtype: str.
+        """
+        if not probe_server(server_address, self.timeout):
+            return f"Appium server {server_address} does not answer"
+        if serial is not None and not probe_device(serial, adb_path, self.timeout):
+            return f"{serial} is not online"
+        return None
+
+    def _heartbeat(self, server_address, adb_path, serial):
+        """Probe until the monitor is stopped or the session is unhealthy.
+
+        :param str server_address: Appium server address.
+        :param str adb_path: adb path or None to skip the device.
+        :param str serial: adb serial of the device.
+        """
+        _failures = 0
+        while not self._stop_event.wait(self.interval) and self.is_healthy:
+            _reason = self._probe(server_address, adb_path, serial)
+            if _reason is None:
+                _failures = 0
+                continue
+            _failures += 1
+            LOGGER.debug("Session %s failed the probe. (%s, %s/%s)",
+                         self.driver.session_id, _reason, _failures, self.failures)
+            if _failures >= self.failures:
+                self.mark_unhealthy(f"{_reason} in {_failures} probes")
+
+    @staticmethod
+    def _work(commands):
+        """Run the commands of the callers until None is put.
+
+        :param queue.SimpleQueue commands: Queue of the commands (context, execute, command name, parameters, result,
+            done event).
+        """
+        while (_command := commands.get()) is not None:
+            _context, _execute, _driver_command, _params, _result, _done = _command
+            try:
+                # The command runs in the context of the caller. (e.g. The round trips are counted into the
+                # instrumentation)
+                _result['response'] = _context.run(_execute, _driver_command, _params)
+            except BaseException as e:
+                _result['error'] = e
+            finally:
+                _done.set()
+
+    def _monitored_execute(self, driver_command, params=None):
+        """Execute the command on the worker thread, and raise SessionUnhealthyError if the session is unhealthy.
+
+        :param str driver_command: Command name.
+        :param dict params: Command parameters.
+        :return: Command response.
+        :rtype: dict.
+        """
+        # The wrapper under the monitor can call the driver again on the worker.
+        if threading.current_thread() is self._worker:
+            return self._execute(driver_command, params)
+
+        _result = {}
+        _done = threading.Event()
+        _token = object()
+        # The command is registered before the health is checked, so mark_unhealthy() can not miss it.
+        with self._lock:
+            self._in_flight[_token] = _done
+        try:
+            if not self.is_healthy:
+                raise SessionUnhealthyError(f"{driver_command} is not sent. Session is unhealthy. ({self.reason})")
+            self._commands.put((contextvars.copy_context(), self._execute, driver_command, params, _result, _done))
+            _done.wait()
+        finally:
+            with self._lock:
+                self._in_flight.pop(_token, None)
+
+        if 'error' in _result:
+            raise _result['error']
+        if 'response' not in _result:
+            raise SessionUnhealthyError(f"{driver_command} is aborted. Session is unhealthy. ({self.reason})")
+        return _result['response']
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Warm Appium session pool.
+Keep the sessions per device and hand them out to the scenarios instead of creating new sessions.
+"""
+import contextlib
+import threading
+
+from appium import webdriver
+from appium.webdriver.appium_connection import AppiumConnection
+
+from anroid_test.module.async_logging import get_logger
+from anroid_test.module.geometry import clear_geometry
+
+LOGGER = get_logger(__name__)
+
+# Keep the idle session alive on the server between the scenarios, in seconds.
+DEFAULT_NEW_COMMAND_TIMEOUT = 600
+# The number of the keep-alive HTTP connections per server.
+DEFAULT_CONNECTION_POOL_SIZE = 10
+
+_CONNECTIONS = {}
+_CONNECTIONS_LOCK = threading.Lock()
+
+
+def get_connection(server_url, pool_size=DEFAULT_CONNECTION_POOL_SIZE) -> AppiumConnection:
+    """Return the keep-alive connection of the Appium server. It is shared by all sessions of the server.
+
+    :param str server_url: Appium server URL (e.g. http://localhost:4723).
+    :param int pool_size: The number of the keep-alive HTTP connections. (default=10)
+    :return: AppiumConnection obj.
+    :rtype: AppiumConnection.
+    """
+    with _CONNECTIONS_LOCK:
+        if server_url not in _CONNECTIONS:
+            _CONNECTIONS[server_url] = AppiumConnection(server_url, keep_alive=True,
+                                                        init_args_for_pool_manager={"maxsize": pool_size})
+        return _CONNECTIONS[server_url]
+
+
+class SessionPool:
+    """Session pool which keeps one warm session per device."""
+
+    def __init__(self, server_url="http://localhost:4723", reset="restart"):
+        """Initialize the SessionPool.
+
+        :param str server_url: Appium server URL. (default=http://localhost:4723)
+        :param str reset: Reset mode between the scenarios (restart, clear, none). (default=restart)
+        """
+        if reset not in ["restart", "clear", "none"]:
+            raise ValueError("Please check the 'reset' value. The 'reset' must be in ['restart', 'clear', 'none']")
+
+        self._server_url = server_url
+        self._reset = reset
+        self._idle_sessions = {}
+        self._busy_sessions = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, capabilities):
+        """Return the warm session of the device. If there is no idle session, create the new session.
+
+        :param dict capabilities: Device capabilities.
+        :return: WebDriver obj.
+        :rtype: WebDriver.
+        """
+        _device_name = capabilities['deviceName']
+        with self._lock:
+            if _device_name in self._busy_sessions:
+                raise RuntimeError(f"The session of {_device_name} is already in use.")
+            _driver = self._idle_sessions.pop(_device_name, None)
+            self._busy_sessions[_device_name] = _driver
+
+        if _driver is not None:
+            LOGGER.debug("Reuse the warm session of %s.", _device_name)
+            return _driver
+
+        _capabilities = dict(capabilities)
+        _capabilities.setdefault("newCommandTimeout", DEFAULT_NEW_COMMAND_TIMEOUT)
+        try:
+            _driver = webdriver.Remote(get_connection(self._server_url), _capabilities)
+        except Exception:
+            with self._lock:
+                self._busy_sessions.pop(_device_name, None)
+            raise
+
+        with self._lock:
+            self._busy_sessions[_device_name] = _driver
+        LOGGER.info("%s is connected.", _device_name)
+        return _driver
+
+    def release(self, driver, capabilities):
+        """Reset the app state and return the session to the pool.
+
+        :param WebDriver driver: WebDriver obj from acquire().
+        :param dict capabilities: Device capabilities which is used for acquire().
+        """
+        _device_name = capabilities['deviceName']
+        try:
+            self._reset_app(driver, capabilities)
+        except Exception:
+            LOGGER.exception(f"Could not reset the app of {_device_name}. Discard the session.")
+            with self._lock:
+                self._busy_sessions.pop(_device_name, None)
+            self._quit(driver, _device_name)
+            return
+
+        with self._lock:
+            self._busy_sessions.pop(_device_name, None)
+            self._idle_sessions[_device_name] = driver
+
+    def discard(self, driver, capabilities):
+        """Quit the session instead of returning it to the pool. (e.g. The session is broken)
+
+        :param WebDriver driver: WebDriver obj from acquire().
+        :param dict capabilities: Device capabilities which is used for acquire().
+        """
+        with self._lock:
+            self._busy_sessions.pop(capabilities['deviceName'], None)
+        self._quit(driver, capabilities['deviceName'])
+
+    @contextlib.contextmanager
+    def session(self, capabilities):
+        """Acquire the session in the with statement and release it at the end.
+
+        :param dict capabilities: Device capabilities.
+        """
+        _driver = self.acquire(capabilities)
+        try:
+            yield _driver
+        except Exception:
+            self.release(_driver, capabilities)
+            raise
+        else:
+            self.release(_driver, capabilities)
+
+    def close(self):
+        """Quit all sessions in the pool."""
+        with self._lock:
+            _sessions = list(self._idle_sessions.items()) + list(self._busy_sessions.items())
+            self._idle_sessions.clear()
+            self._busy_sessions.clear()
+
+        for _device_name, _driver in _sessions:
+            if _driver is not None:
+                self._quit(_driver, _device_name)
+
+    def _reset_app(self, driver, capabilities):
+        """Reset the app state of the session.
+
+        :param WebDriver driver: WebDriver obj.
+        :param dict capabilities: Device capabilities.
+        """
+        _app_package = capabilities.get('appPackage')
+        if self._reset == "none" or _app_package is None:
+            return
+
+        if self._reset == "clear":
+            driver.execute_script("mobile: clearApp", {"appId": _app_package})
+        else:
+            driver.terminate_app(_app_package)
+        driver.activate_app(_app_package)
+        clear_geometry(driver)
+
+    @staticmethod
+    def _quit(driver, device_name):
+        """Quit the session.
+
+        :param WebDriver driver: WebDriver obj.
+        :param str device_name: Device name.
+        """
+        clear_geometry(driver)
+        try:
+            driver.quit()
+        except Exception:
+            LOGGER.exception(f"Could not quit the session of {device_name}.")
+        LOGGER.info("%s is disconnected.", device_name)
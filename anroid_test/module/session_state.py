@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""Session state cache.
+Track the session state which the commands of the driver already told (timeouts, keyboard visibility, lock state,
+network connectivity), and skip the commands which would not change anything or which ask the known state.
+The state of the device is forgotten after any command which could change it, and after max_age seconds.
+
+    with SessionStateCache(_driver):
+        touch(_driver, '//*[@text="Battery"]')      # implicitly_wait(1) is sent once.
+        touch(_driver, '//*[@text="Display"]')
+"""
+import time
+
+from appium.webdriver.mobilecommand import MobileCommand
+from selenium.webdriver.remote.command import Command
+
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Seconds to trust the device state. (e.g. The screen is locked by the screen timeout)
+DEFAULT_MAX_AGE = 5.0
+
+# Commands and extension scripts which ask the device state.
+_STATE_QUERIES = {
+    "mobile: isKeyboardShown": "keyboard", MobileCommand.IS_KEYBOARD_SHOWN: "keyboard",
+    "mobile: isLocked": "locked", MobileCommand.IS_LOCKED: "locked",
+    "mobile: getConnectivity": "connectivity",
+}
+# Commands and extension scripts which do not change the device.
+_NEUTRAL_COMMANDS = {
+    Command.GET_PAGE_SOURCE, Command.SCREENSHOT, Command.ELEMENT_SCREENSHOT, Command.GET_WINDOW_RECT,
+    Command.GET_SCREEN_ORIENTATION, Command.GET_ELEMENT_TEXT, Command.GET_ELEMENT_ATTRIBUTE,
+    Command.GET_ELEMENT_PROPERTY, Command.GET_ELEMENT_RECT, Command.GET_ELEMENT_TAG_NAME, Command.IS_ELEMENT_SELECTED,
+    Command.IS_ELEMENT_ENABLED, Command.W3C_GET_ACTIVE_ELEMENT, Command.FIND_ELEMENT, Command.FIND_ELEMENTS,
+    Command.FIND_CHILD_ELEMENT, Command.FIND_CHILD_ELEMENTS, MobileCommand.GET_CURRENT_ACTIVITY,
+    MobileCommand.GET_CURRENT_PACKAGE, MobileCommand.GET_NETWORK_CONNECTION,
+    "mobile: getCurrentActivity", "mobile: getCurrentPackage", "mobile: getDeviceTime", "mobile: getPerformanceData",
+    "mobile: listApps",
+}
+_CONNECTIVITY_KEYS = ("wifi", "data", "airplaneMode")
+
+
+def _command_key(driver_command, params) -> str:
+    """Return the extension script name of the execute script command, or the command name.
+
+    :param str driver_command: Command name.
+    :param dict params: Command parameters.
+    :return: Script name or command name.
+    :rtype: str.
+    """
+    if driver_command == Command.W3C_EXECUTE_SCRIPT:
+        return (params or {}).get('script')
+    return driver_command
+
+
+def _script_arguments(driver_command, params) -> dict:
+    """Return the arguments of the extension script, or the parameters of the command.
+
+    :param str driver_command: Command name.
+    :param dict params: Command parameters.
+    :return: Arguments dictionary.
+    :rtype: dict.
+    """
+    if driver_command == Command.W3C_EXECUTE_SCRIPT:
+        _args = (params or {}).get('args') or [{}]
+        return _args[0] if isinstance(_args[0], dict) else {}
+    return params or {}
+
+
+class SessionStateCache:
+    """Skip the redundant commands of the driver with the known session state."""
+
+    def __init__(self, driver, max_age=DEFAULT_MAX_AGE):
+        """Initialize the SessionStateCache.
+
+        :param WebDriver driver: WebDriver obj.
+        :param float max_age: Seconds to trust the device state. (default=5.0)
+        """
+        self.driver = driver
+        self.max_age = max_age
+        self.elided = 0
+        self._execute = None
+        self._previous_execute = None
+        self._timeouts = {}
+        self._states = {}
+
+    def start(self):
+        """Start tracking. Wrap the execute method of the driver."""
+        if self._execute is not None:
+            return self
+
+        self._previous_execute = self.driver.__dict__.get('execute')
+        self._execute = self.driver.execute
+        self.driver.execute = self._eliding_execute
+        return self
+
+    def stop(self):
+        """Stop tracking. Restore the execute method of the driver."""
+        if self._execute is None:
+            return
+
+        if self._previous_execute is None:
+            del self.driver.execute
+        else:
+            self.driver.execute = self._previous_execute
+        self._execute = None
+        self.clear()
+        LOGGER.debug("Skipped %s redundant commands.", self.elided)
+
+    def clear(self):
+        """Forget the session state."""
+        self._timeouts.clear()
+        self._states.clear()
+
+    def invalidate(self):
+        """Forget the device state. (e.g. The state is changed by adb out of the session)"""
+        self._states.clear()
+
+    def _get_state(self, name):
+        """Return the known device state.
+
+        :param str name: State name.
+        :return: State value or None if it is unknown or too old.
+        """
+        _state = self._states.get(name)
+        if _state is None or time.monotonic() - _state[1] > self.max_age:
+            return None
+        return _state[0]
+
+    def _set_state(self, name, value):
+        """Remember the device state.
+
+        :param str name: State name.
+        :param value: State value. None forgets the state.
+        """
+        if value is None:
+            self._states.pop(name, None)
+        else:
+            self._states[name] = (value, time.monotonic())
+
+    def _elide(self, key):
+        """Count the skipped command and return the empty response.
+
+        :param str key: Script name or command name.
+        :return: Empty response.
+        :rtype: dict.
+        """
+        self.elided += 1
+        LOGGER.debug("Skip '%s' which does not change the session state.", key)
+        return {"value": None}
+
+    def _eliding_execute(self, driver_command, params=None):
+        """Execute the command unless its result is already known.
+
+        :param str driver_command: Command name.
+        :param dict params: Command parameters.
+        :return: Command response.
+        :rtype: dict.
+        """
+        _key = _command_key(driver_command, params)
+        _arguments = _script_arguments(driver_command, params)
+
+        if _key in _STATE_QUERIES:
+            _state = self._get_state(_STATE_QUERIES[_key])
+            if _state is not None:
+                self.elided += 1
+                return {"value": _state}
+            _response = self._execute(driver_command, params)
+            self._set_state(_STATE_QUERIES[_key], _response.get('value'))
+            return _response
+        if _key in _NEUTRAL_COMMANDS:
+            return self._execute(driver_command, params)
+
+        if _key == Command.SET_TIMEOUTS:
+            if _arguments and all(self._timeouts.get(_name) == _value for _name, _value in _arguments.items()):
+                return self._elide(_key)
+            _response = self._execute(driver_command, params)
+            self._timeouts.update(_arguments)
+            return _response
+        if _key == Command.GET_TIMEOUTS:
+            _response = self._execute(driver_command, params)
+            self._timeouts.update(_response.get('value') or {})
+            return _response
+        if _key in [Command.NEW_SESSION, Command.QUIT]:
+            self.clear()
+            return self._execute(driver_command, params)
+
+        if _key in ["mobile: hideKeyboard", MobileCommand.HIDE_KEYBOARD]:
+            if self._get_state("keyboard") is False:
+                return self._elide(_key)
+            _response = self._execute(driver_command, params)
+            self.invalidate()
+            self._set_state("keyboard", False)
+            return _response
+        if _key in ["mobile: unlock", MobileCommand.UNLOCK]:
+            if self._get_state("locked") is False:
+                return self._elide(_key)
+            _response = self._execute(driver_command, params)
+            self.invalidate()
+            self._set_state("locked", False)
+            return _response
+        if _key in ["mobile: lock", MobileCommand.LOCK]:
+            _response = self._execute(driver_command, params)
+            self.invalidate()
+            # The device is unlocked again after the seconds if the seconds is positive.
+            self._set_state("locked", not (_arguments.get('seconds') or 0) > 0)
+            return _response
+        if _key == "mobile: setConnectivity":
+            _connectivity = self._get_state("connectivity")
+            if _connectivity is not None and all(_connectivity.get(_name) == _value
+                                                 for _name, _value in _arguments.items()):
+                return self._elide(_key)
+            _response = self._execute(driver_command, params)
+            self.invalidate()
+            _connectivity = dict(_connectivity or {}, **_arguments)
+            if all(_name in _connectivity for _name in _CONNECTIVITY_KEYS):
+                self._set_state("connectivity", _connectivity)
+            return _response
+
+        # Any other command can change the device state. (e.g. The touch shows the keyboard)
+        self.invalidate()
+        return self._execute(driver_command, params)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Device shell.
+Run the adb shell command through 'mobile: shell'. The Appium server must be started with '--relaxed-security'.
+"""
+
+import selenium.common.exceptions
+
+from anroid_test.module.async_logging import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Message fragments of the Appium error which rejects the insecure feature.
+# (e.g. Potentially insecure feature 'adb_shell' has not been enabled. ... --relaxed-security ...)
+_DENIED_MESSAGES = ("adb_shell", "relaxed-security", "insecure feature")
+
+# Sessions which are not allowed to use 'mobile: shell'
+_shell_denied_sessions = set()
+
+
+def is_shell_allowed(driver) -> bool:
+    """Return False if 'mobile: shell' was rejected in the session.
+
+    :param WebDriver driver: WebDriver obj.
+    :return: Shell is allowed or not known yet.
+    :rtype: bool.
+    """
+    return driver.session_id not in _shell_denied_sessions
+
+
+def _is_shell_denied(error) -> bool:
+    """Check the error is the rejection of the insecure 'adb_shell' feature.
+
+    :param WebDriverException error: Error of 'mobile: shell'.
+    :return: True if the shell is not allowed in the Appium server.
+    :rtype: bool.
+    """
+    _message = str(error.msg if error.msg is not None else error).lower()
+    return any(_fragment in _message for _fragment in _DENIED_MESSAGES)
+
+
+def execute_shell(driver, command, args) -> bool:
+    """Run the shell command. If it is rejected, remember the session and do not try again.
+    The other errors (e.g. Timeout, the command is partly executed) are raised, because the caller must not
+    repeat the command in the other way.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str command: Shell command (e.g. input)
+    :param list args: Shell command arguments. (e.g. ["keyevent", "3"])
+    :return: True if the command is executed, False if the shell is not allowed.
+    :rtype: bool.
+    """
+    if not is_shell_allowed(driver):
+        return False
+
+    try:
+        driver.execute_script("mobile: shell", {"command": command, "args": args})
+        return True
+    except selenium.common.exceptions.WebDriverException as e:
+        if not _is_shell_denied(e):
+            raise
+        _shell_denied_sessions.add(driver.session_id)
+        LOGGER.warning("Could not use 'mobile: shell'. Please start the Appium server with '--relaxed-security'.")
+        return False
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""Visual locator.
+Find the reference image in the screenshot with the normalized cross-correlation, and return the center position
+which can be passed to touch(), double_touch() and long_press(). (e.g. Canvas rendered UI like the map)
+
+The match is searched on the coarse level of the image pyramid first, and refined on the finer levels only around
+the candidate. The reference image must be cropped from the screenshot of the same resolution.
+
+    touch(_driver, locate_image(_driver, "reference/map_search.png"))
+"""
+import functools
+import io
+import os
+from typing import Union
+
+import numpy as np
+from PIL import Image
+
+import selenium.common.exceptions
+
+from anroid_test.module.async_logging import get_logger
+from anroid_test.module.geometry import get_window_geometry
+
+LOGGER = get_logger(__name__)
+
+DEFAULT_THRESHOLD = 0.8
+# The coarsest level keeps the reference image larger than this size, in pixels.
+MIN_TEMPLATE_SIZE = 16
+MAX_PYRAMID_LEVEL = 4
+
+
+def _to_gray(image) -> np.ndarray:
+    """Convert the Pillow image to the gray scale array.
+
+    :param PIL.Image.Image image: Pillow image.
+    :return: Gray scale array which shape is (height, width).
+    :rtype: numpy.ndarray.
+    """
+    return np.asarray(image.convert('L'), dtype=np.float32)
+
+
+def _downscale(array) -> np.ndarray:
+    """Downscale the array to half by 2x2 block average.
+
+    :param numpy.ndarray array: Gray scale array.
+    :return: Half size array.
+    :rtype: numpy.ndarray.
+    """
+    _height, _width = array.shape[0] // 2 * 2, array.shape[1] // 2 * 2
+    return array[:_height, :_width].reshape(_height // 2, 2, _width // 2, 2).mean(axis=(1, 3))
+
+
+def _build_pyramid(array, levels) -> list:
+    """Build the image pyramid.
+
+    :param numpy.ndarray array: Gray scale array.
+    :param int levels: The number of levels including the original.
+    :return: Array list from the original to the coarsest.
+    :rtype: list.
+    """
+    _pyramid = [array]
+    for _ in range(levels - 1):
+        _pyramid.append(_downscale(_pyramid[-1]))
+    return _pyramid
+
+
+def _pyramid_levels(template_shape) -> int:
+    """Return the number of the pyramid levels which keeps the reference image larger than MIN_TEMPLATE_SIZE.
+
+    :param tuple template_shape: Reference image shape (height, width).
+    :return: The number of levels.
+    :rtype: int.
+    """
+    _levels = 1
+    _size = min(template_shape)
+    while _levels < MAX_PYRAMID_LEVEL and _size // 2 >= MIN_TEMPLATE_SIZE:
+        _size //= 2
+        _levels += 1
+    return _levels
+
+
+@functools.lru_cache(maxsize=64)
+def _load_template(path, modified_time) -> tuple:
+    """Load the reference image and its pyramid. The modified time is the part of the cache key.
+
+    :param str path: Reference image path.
+    :param float modified_time: Modified time of the file.
+    :return: Pyramid of the reference image from the original to the coarsest.
+    :rtype: tuple.
+    """
+    with Image.open(path) as _image:
+        _array = _to_gray(_image)
+    LOGGER.debug("Cache the reference image %s (%sx%s).", path, _array.shape[1], _array.shape[0])
+    return tuple(_build_pyramid(_array, _pyramid_levels(_array.shape)))
+
+
+def _window_sums(array, height, width) -> np.ndarray:
+    """Return the sum of every window with the integral image.
+
+    :param numpy.ndarray array: Array which shape is (H, W).
+    :param int height: Window height.
+    :param int width: Window width.
+    :return: Window sums which shape is (H - height + 1, W - width + 1).
+    :rtype: numpy.ndarray.
+    """
+    _integral = np.zeros((array.shape[0] + 1, array.shape[1] + 1), dtype=np.float64)
+    _integral[1:, 1:] = array.cumsum(axis=0).cumsum(axis=1)
+    return (_integral[height:, width:] - _integral[:-height, width:]
+            - _integral[height:, :-width] + _integral[:-height, :-width])
+
+
+def normalized_cross_correlation(image, template) -> np.ndarray:
+    """Return the normalized cross-correlation of the template at every position of the image.
+
+    :param numpy.ndarray image: Gray scale image which shape is (H, W).
+    :param numpy.ndarray template: Gray scale template which shape is (h, w).
+    :return: Score map from -1 to 1 which shape is (H - h + 1, W - w + 1).
+    :rtype: numpy.ndarray.
+    """
+    _height, _width = template.shape
+    _template = template - template.mean()
+    _template_norm = np.sqrt((_template ** 2).sum())
+
+    # The correlation of all positions at once. (The valid positions have no wrap-around of the circular correlation)
+    _shape = image.shape
+    _correlation = np.fft.irfft2(np.fft.rfft2(image) * np.conj(np.fft.rfft2(_template, s=_shape)), s=_shape)
+    _correlation = _correlation[:_shape[0] - _height + 1, :_shape[1] - _width + 1]
+
+    _count = _height * _width
+    _sums = _window_sums(image, _height, _width)
+    _variances = _window_sums(image.astype(np.float64) ** 2, _height, _width) - _sums ** 2 / _count
+    _denominator = np.sqrt(np.maximum(_variances, 0)) * _template_norm
+    return np.where(_denominator > 1e-6, _correlation / np.maximum(_denominator, 1e-6), 0.0)
+
+
+def _best_match(image, template, top=0, left=0) -> tuple:
+    """Return the best position of the template in the image.
+
+    :param numpy.ndarray image: Gray scale image.
+    :param numpy.ndarray template: Gray scale template.
+    :param int top: Top offset of the image in the level.
+    :param int left: Left offset of the image in the level.
+    :return: Best position and score (top, left, score).
+    :rtype: tuple.
+    """
+    _scores = normalized_cross_correlation(image, template)
+    _y, _x = np.unravel_index(np.argmax(_scores), _scores.shape)
+    return top + int(_y), left + int(_x), float(_scores[_y, _x])
+
+
+def match_template(screen, template_pyramid, margin=4) -> tuple:
+    """Find the template from the coarse level to the fine level of the pyramid.
+
+    :param numpy.ndarray screen: Gray scale screenshot.
+    :param tuple template_pyramid: Pyramid of the reference image from the original to the coarsest.
+    :param int margin: Search margin around the candidate on the finer level, in pixels. (default=4)
+    :return: Top-left position and score on the original level (top, left, score).
+    :rtype: tuple.
+    """
+    _screen_pyramid = _build_pyramid(screen, len(template_pyramid))
+    _top, _left, _score = _best_match(_screen_pyramid[-1], template_pyramid[-1])
+    for _level in range(len(template_pyramid) - 2, -1, -1):
+        _screen, _template = _screen_pyramid[_level], template_pyramid[_level]
+        _top_min = max(_top * 2 - margin, 0)
+        _left_min = max(_left * 2 - margin, 0)
+        _top_max = min(_top * 2 + margin, _screen.shape[0] - _template.shape[0])
+        _left_max = min(_left * 2 + margin, _screen.shape[1] - _template.shape[1])
+        _region = _screen[_top_min:_top_max + _template.shape[0], _left_min:_left_max + _template.shape[1]]
+        _top, _left, _score = _best_match(_region, _template, _top_min, _left_min)
+    return _top, _left, _score
+
+
+def locate_image(driver, template_path, threshold=DEFAULT_THRESHOLD, screenshot: Union[bytes, None] = None) -> dict:
+    """Return the center position of the reference image in the current screen.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str template_path: Reference image path. (e.g. PNG cropped from the screenshot)
+    :param float threshold: The minimum score from -1 to 1. (default=0.8)
+    :param bytes screenshot: PNG screenshot to reuse. If it is None, take the new screenshot. (default=None)
+    :return: Position dictionary {"x": x, "y": y}.
+    :rtype: dict.
+    """
+    _template_pyramid = _load_template(template_path, os.path.getmtime(template_path))
+    if screenshot is None:
+        screenshot = driver.get_screenshot_as_png()
+    with Image.open(io.BytesIO(screenshot)) as _image:
+        _screen = _to_gray(_image)
+
+    _template_height, _template_width = _template_pyramid[0].shape
+    if _screen.shape[0] < _template_height or _screen.shape[1] < _template_width:
+        LOGGER.exception(msg := f"The reference image {template_path} is larger than the screenshot.")
+        raise ValueError(msg)
+
+    _top, _left, _score = match_template(_screen, _template_pyramid)
+    if _score < threshold:
+        LOGGER.exception(msg := f"Could not find the '{template_path}' in the screen. "
+                                f"(score={_score:.3f} < threshold={threshold})")
+        raise selenium.common.exceptions.NoSuchElementException(msg)
+
+    # The screenshot covers the whole display, but the window excludes the system bars. So the height ratio is not the
+    # scale, and the width ratio is used only when the screenshot is narrower than the window. (e.g. Scaled by server)
+    _window_width = get_window_geometry(driver)['width']
+    _scale = _window_width / _screen.shape[1] if _screen.shape[1] < _window_width else 1.0
+    _position = {"x": int((_left + _template_width / 2) * _scale), "y": int((_top + _template_height / 2) * _scale)}
+    LOGGER.debug("Find the '%s' at %s (score=%.3f).", template_path, _position, _score)
+    return _position
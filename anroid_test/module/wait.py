@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Wait for the UI idle.
+Poll a cheap UI signal and return as soon as the UI is settled instead of the fixed sleep.
+"""
+import hashlib
+import time
+
+from anroid_test.module.async_logging import get_logger
+from anroid_test.module.geometry import observe_activity
+
+LOGGER = get_logger(__name__)
+
+DEFAULT_SETTLE_TIMEOUT = 3.0
+
+
+def _read_signal(driver, signal):
+    """Read the UI signal.
+
+    :param WebDriver driver: WebDriver obj.
+    :param str signal: UI signal type (page_source, activity)
+    :return: Signal value which can be compared.
+    """
+    if signal == "page_source":
+        return hashlib.md5(driver.page_source.encode('utf-8')).digest()
+
+    _activity = driver.current_activity
+    observe_activity(driver, _activity)
+    return _activity
+
+
+def wait_for_idle(driver, timeout=DEFAULT_SETTLE_TIMEOUT, signal="page_source", interval=0.1, max_interval=1.0,
+                  backoff=2.0) -> bool:
+    """Wait until the UI signal is not changed between two polls.
+
+    :param WebDriver driver: WebDriver obj.
+    :param float timeout: The ceiling of waiting time, in seconds. (default=3.0)
+    :param str signal: UI signal type (page_source, activity). (default=page_source)
+    :param float interval: The first polling interval, in seconds. (default=0.1)
+    :param float max_interval: The maximum polling interval, in seconds. (default=1.0)
+    :param float backoff: Multiplier of the polling interval while the UI is changing. (default=2.0)
+    :return: True if the UI is settled, False if the timeout is over.
+    :rtype: bool.
+    """
+    if signal not in ["page_source", "activity"]:
+        LOGGER.exception(msg := "Please check the 'signal' value. The 'signal' must be in ['page_source', 'activity']")
+        raise ValueError(msg)
+
+    _start_time = time.monotonic()
+    _deadline = _start_time + timeout
+    _previous = _read_signal(driver, signal)
+    while (_remain := _deadline - time.monotonic()) > 0:
+        time.sleep(min(interval, _remain))
+        _current = _read_signal(driver, signal)
+        if _current == _previous:
+            LOGGER.debug("UI is settled in %.2f sec.", time.monotonic() - _start_time)
+            return True
+        _previous = _current
+        interval = min(interval * backoff, max_interval)
+
+    LOGGER.warning("UI is not settled within %s sec.", timeout)
+    return False
+
+
+def settle_ui(driver, settle) -> None:
+    """Wait for the UI idle by the settle option of step helpers.
+
+    :param WebDriver driver: WebDriver obj.
+    :param Union[bool, float, None] settle: Settle option. (None, False or 0: Not wait,
+        True: Wait with the default ceiling, float: Wait with the ceiling seconds)
+    """
+    if not settle:
+        return
+
+    if settle is True:
+        wait_for_idle(driver)
+    else:
+        wait_for_idle(driver, timeout=float(settle))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import os
+
+from anroid_test.module.artifact_store import MAX_DELTA_CHAIN, ArtifactStore
+
+
+def _make_page(index) -> str:
+    _lines = [f'<node index="{_line}" text="line {_line}"/>\n' for _line in range(200)]
+    _lines[index % 200] = f'<node index="{index}" text="page {index}"/>\n'
+    return "<hierarchy>\n" + "".join(_lines) + "</hierarchy>\n"
+
+
+def _depth_on_disk(store, digest) -> int:
+    _depth = 0
+    while os.path.exists(_path := store._object_path(digest, ".delta.gz")):
+        with open(_path, 'rb') as f:
+            digest = json.loads(gzip.decompress(f.read()))['base']
+        _depth += 1
+    return _depth
+
+
+def _revisit_pages(store, pages, start, stop):
+    for _index in range(start, stop):
+        pages[_index] = store.put_page(_make_page(_index))
+        # Go back to the page which is already stored. (e.g. The back key)
+        store.put_page(_make_page(max(_index - 1, 0)))
+
+
+def test_revisited_pages_keep_the_delta_chain_short(tmp_path):
+    _store = ArtifactStore(str(tmp_path))
+    _pages = {}
+    _revisit_pages(_store, _pages, 0, 100)
+
+    assert max(_depth_on_disk(_store, _digest) for _digest in _pages.values()) < MAX_DELTA_CHAIN
+    for _index, _digest in _pages.items():
+        assert _store.get_page(_digest) == _make_page(_index)
+
+
+def test_reopened_store_reads_the_delta_chain_from_the_files(tmp_path):
+    _pages = {}
+    _revisit_pages(ArtifactStore(str(tmp_path)), _pages, 0, 50)
+    _store = ArtifactStore(str(tmp_path))
+    _revisit_pages(_store, _pages, 50, 100)
+
+    assert max(_depth_on_disk(_store, _digest) for _digest in _pages.values()) < MAX_DELTA_CHAIN
+    for _index, _digest in _pages.items():
+        assert _store.get_page(_digest) == _make_page(_index)
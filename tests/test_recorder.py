@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import pytest
+from appium import webdriver
+
+from anroid_test.benchmark.bench_modules import capabilities
+from anroid_test.benchmark.fake_appium_server import FakeAppiumServer
+from anroid_test.module.recorder import Recorder
+from anroid_test.module.session_health import HealthMonitor
+from anroid_test.module.session_state import SessionStateCache
+
+
+@pytest.fixture
+def driver():
+    with FakeAppiumServer() as _server:
+        _driver = webdriver.Remote(_server.url, capabilities)
+        yield _driver
+
+
+def test_stop_restores_the_wrapper_installed_before_start(driver, tmp_path):
+    _cache = SessionStateCache(driver).start()
+    _recorder = Recorder(driver, str(tmp_path / "recording.jsonl")).start()
+    driver.implicitly_wait(1)
+    _recorder.stop()
+
+    assert driver.execute == _cache._eliding_execute
+    _cache.stop()
+    assert 'execute' not in driver.__dict__
+
+
+def test_stop_keeps_the_two_stacked_wrappers(driver, tmp_path):
+    _monitor = HealthMonitor(driver).start()
+    _cache = SessionStateCache(driver).start()
+    _recorder = Recorder(driver, str(tmp_path / "recording.jsonl")).start()
+    driver.page_source
+    _recorder.stop()
+
+    assert driver.execute == _cache._eliding_execute
+    _cache.stop()
+    assert driver.execute == _monitor._monitored_execute
+    _monitor.stop()
+    assert 'execute' not in driver.__dict__
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+from appium import webdriver
+
+from anroid_test.benchmark.bench_modules import capabilities
+from anroid_test.benchmark.fake_appium_server import FakeAppiumServer
+from anroid_test.module.screencapture import _write_file_part, stop_recording
+
+
+@pytest.mark.parametrize("recording_size", [0, 10, 3 * 1024 * 1024 + 7])
+@pytest.mark.parametrize("use_sink", [False, True])
+def test_stop_recording_saves_the_video_bytes(tmp_path, recording_size, use_sink):
+    with FakeAppiumServer(recording_size=recording_size) as _server:
+        _driver = webdriver.Remote(_server.url, capabilities)
+        _path = stop_recording(_driver, str(tmp_path / "recording.mp4"), use_sink=use_sink)
+
+        with open(_path, 'rb') as f:
+            assert f.read() == _server.recording
+
+
+def test_write_file_part_skips_the_form_fields_over_the_chunk_boundaries():
+    _video = bytes(range(256)) * 4 + b"\r\n--boundar"
+    _body = (b"--boundary\r\nContent-Disposition: form-data; name=\"user\"\r\n\r\nname\r\n"
+             b"--boundary\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.mp4\"\r\n\r\n"
+             + _video + b"\r\n--boundary--\r\n")
+    _file = io.BytesIO()
+
+    assert _write_file_part(_file, iter(_body[_index:_index + 3] for _index in range(0, len(_body), 3)), b"boundary")
+    assert _file.getvalue() == _video
+
+
+def test_write_file_part_without_the_file_part():
+    _body = b"--boundary\r\nContent-Disposition: form-data; name=\"user\"\r\n\r\nname\r\n--boundary--\r\n"
+
+    assert not _write_file_part(io.BytesIO(), iter([_body]), b"boundary")
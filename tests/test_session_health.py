@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+from appium import webdriver
+
+from anroid_test.benchmark.bench_modules import capabilities
+from anroid_test.benchmark.fake_appium_server import FakeAppiumServer
+from anroid_test.module import instrumentation
+from anroid_test.module.session_health import HealthMonitor, SessionUnhealthyError
+
+
+@pytest.fixture
+def driver():
+    with FakeAppiumServer() as _server:
+        _driver = webdriver.Remote(_server.url, capabilities)
+        yield _driver
+
+
+def test_commands_run_on_one_worker_in_the_caller_context(driver):
+    instrumentation.reset()
+    instrumentation.instrument_driver(driver, "health_device")
+    _read_screen = instrumentation.instrument_function(lambda _driver: (_driver.page_source, _driver.page_source),
+                                                       "health")
+    _threads = set()
+    _original_execute = driver.execute
+
+    def _execute(driver_command, params=None):
+        _threads.add(threading.current_thread())
+        return _original_execute(driver_command, params)
+
+    driver.execute = _execute
+    with HealthMonitor(driver):
+        _read_screen(driver)
+        _read_screen(driver)
+
+    assert len(_threads) == 1 and threading.current_thread() not in _threads
+    assert instrumentation.export_json()["function"]["health_device"]["health.<lambda>"]["round_trips"] == 4
+
+
+def test_commands_fail_fast_after_the_session_is_unhealthy(driver):
+    with HealthMonitor(driver) as _monitor:
+        _monitor.mark_unhealthy("test")
+        with pytest.raises(SessionUnhealthyError):
+            driver.page_source
+        assert _monitor._in_flight == {}